@@ -1,8 +1,21 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-import re
+import os
+import time
+
+from background_refresh import BackgroundRefresher
+from breach_index import BreachIndex, format_countdown
+from figures import SLA_COLOR_MAP, STATUS_COLOR_MAP, bucket_trend, dept_figure, donut_figure, trend_figure
+from data_prep import SITE_COL
+from loader import load_prepared
+from multi_source import MultiSourceLoader, parse_sources, site_snapshot_path
+from profiling import RerunProfiler
+from rollup import (
+    build_open_cube, combine_cubes, cube_closed_total, cube_counts, cube_total, filter_frame,
+)
+from shared_snapshot import SharedSnapshotDir
+from sla_engine import age_open_tickets
+from table_pager import DISPLAY_COLS, PAGE_SIZES, SORT_KEYS, query_page
 
 # ==========================================
 # 1. ตั้งค่าหน้าเว็บ (บรรทัดแรกสุดเสมอ)
@@ -71,6 +84,9 @@ st.markdown("""
 # ==========================================
 # 3. 🔒 ระบบ Login ป้องกันคนนอก
 # ==========================================
+# ตั้งค่า HELPDESK_ADMIN_PASSWORD เพื่อให้ผู้ดูแลเห็นแผง Profiling ใน Sidebar
+ADMIN_PASSWORD = os.environ.get("HELPDESK_ADMIN_PASSWORD")
+
 if "authenticated" not in st.session_state:
     st.session_state["authenticated"] = False
 
@@ -84,8 +100,9 @@ if not st.session_state["authenticated"]:
         password = st.text_input("🔑 รหัสผ่าน (Password):", type="password")
         
         if st.button("เข้าสู่ระบบ (Login)", use_container_width=True):
-            if password == "123456":  
+            if password == "123456" or (ADMIN_PASSWORD and password == ADMIN_PASSWORD):  
                 st.session_state["authenticated"] = True
+                st.session_state["is_admin"] = bool(ADMIN_PASSWORD) and password == ADMIN_PASSWORD
                 st.rerun() 
             else:
                 st.error("❌ รหัสผ่านไม่ถูกต้อง กรุณาลองใหม่!")
@@ -109,68 +126,258 @@ def create_kpi_card(title, value, accent_color, bg_icon_color):
 def section_title(text, icon=""):
     st.markdown(f"<h3 style='color: #0F172A; font-weight: 700; margin-top: 10px; margin-bottom: 15px;'>{icon} {text}</h3>", unsafe_allow_html=True)
 
-def parse_sla_to_mins(sla_text):
-    if pd.isna(sla_text): return 0
-    text = str(sla_text)
-    days = sum(map(int, re.findall(r'(\d+)\s*วัน', text)))
-    hours = sum(map(int, re.findall(r'(\d+)\s*ชั่วโมง', text)))
-    mins = sum(map(int, re.findall(r'(\d+)\s*นาที', text)))
-    return (days * 1440) + (hours * 60) + mins
-
-def calculate_actual_mins(row, now):
-    if row['สถานะ'] in ['ปิด Case', 'เสร็จสิ้น']:
-        if pd.notna(row['Received_DT']) and pd.notna(row['Closed_DT']):
-            return (row['Closed_DT'] - row['Received_DT']).total_seconds() / 60
-        return 0
-    else:
-        if pd.notna(row['Received_DT']):
-            return (now - row['Received_DT']).total_seconds() / 60
-        return 0
-
-def get_sla_status_label(row):
-    limit = row['sla_limit_minutes']
-    actual = row['actual_minutes_spent']
-    is_closed = row['สถานะ'] in ['ปิด Case', 'เสร็จสิ้น']
-    if is_closed: return '✅ ภายใน SLA' if actual <= limit else '❌ เกิน SLA (ปิดแล้ว)'
-    else:
-        if actual > limit: return '🔥 เกินกำหนด (รีบปิดด่วน!)'
-        elif limit > 0 and (actual / limit) >= 0.8: return '⚠️ ใกล้หลุด SLA (เร่งมือ)'
-        else: return '🟢 ปกติ'
-
 # ==========================================
 # 5. โหลดและจัดการข้อมูล
 # ==========================================
 SHEET_URL = "https://docs.google.com/spreadsheets/d/e/2PACX-1vSRVUhShKYRay7zI0R4LcD9YBoe9VaZHIYvSRMWNXBAMDFws78ImtPqVPAfqKSvD_4lua8dgJm1OTaG/pub?output=csv"
 
-@st.cache_data(ttl=300)
+# ตั้งค่า HELPDESK_SOURCES เพื่อรวมหลาย Sheet (หนึ่ง Sheet ต่อไซต์) เช่น "BKK=https://...;CNX=/data/cnx.csv"
+# โหลดพร้อมกันบน thread pool แล้วเพิ่มมิติ site ให้กรองได้ (ไม่ตั้ง = ใช้ SHEET_URL อย่างเดียว)
+SOURCES = parse_sources(os.environ.get("HELPDESK_SOURCES"))
+SOURCE_TIMEOUT_SECONDS = float(os.environ.get("HELPDESK_SOURCE_TIMEOUT", 60))
+
+# ตั้งค่า HELPDESK_SNAPSHOT_PATH เพื่อเก็บ snapshot ในเครื่อง แล้วซิงก์เฉพาะแถวที่เปลี่ยน
+SNAPSHOT_PATH = os.environ.get("HELPDESK_SNAPSHOT_PATH")
+
+# ตั้งค่า HELPDESK_SHARED_DIR เพื่ออ่าน snapshot ที่ precompute_worker.py เตรียมไว้ (ไม่ดึง Sheet เอง)
+SHARED_DIR = os.environ.get("HELPDESK_SHARED_DIR")
+
+# ตั้งค่า HELPDESK_INGEST_CHUNK_MB เพื่อโหลด CSV ทีละ chunk ขนาดประมาณนี้ (MB ต่อ chunk หลังเตรียมคอลัมน์)
+# เป็นขนาด chunk ไม่ใช่เพดานหน่วยความจำของ process (ไม่ตั้ง = โหลดทีเดียว)
+# ถ้าตั้ง HELPDESK_SNAPSHOT_PATH ด้วย delta sync จะมีผลก่อน และอ่านทั้งไฟล์ทีเดียว (ค่านี้ไม่มีผล มี warning ใน log)
+INGEST_CHUNK_MB = float(os.environ.get("HELPDESK_INGEST_CHUNK_MB") or 0) or None
+
+# HELPDESK_REFRESH_MODE=background -> เสิร์ฟข้อมูลชุดเดิมระหว่างที่ thread เบื้องหลังโหลดชุดใหม่ (ไม่มีใครต้องรอ spinner)
+REFRESH_MODE = os.environ.get("HELPDESK_REFRESH_MODE", "ttl")
+DATA_TTL_SECONDS = 300
+
+# ตั้งค่า HELPDESK_PROFILE_LOG เพื่อบันทึกเวลาแต่ละขั้นตอนของทุก rerun เป็น JSON lines
+PROFILE_LOG_PATH = os.environ.get("HELPDESK_PROFILE_LOG")
+
+# cache เก็บเฉพาะข้อมูลที่ไม่ขึ้นกับเวลา ส่วนอายุเคสที่เปิดอยู่คำนวณใหม่ทุก rerun
+@st.cache_data(ttl=DATA_TTL_SECONDS)
 def load_and_prep_data(url):
-    df = pd.read_csv(url)
-    df.columns = df.columns.str.strip() 
-    if 'วัน / เวลา (รับเรื่องร้องขอ)' in df.columns:
-        df['Received_DT'] = pd.to_datetime(df['วัน / เวลา (รับเรื่องร้องขอ)'], format='%d/%m/%y %H:%M:%S', errors='coerce')
-        df['Received_Date'] = df['Received_DT'].dt.date
-    if 'วัน / เวลา (ปิดเคส)' in df.columns:
-        df['Closed_DT'] = pd.to_datetime(df['วัน / เวลา (ปิดเคส)'], format='%d/%m/%y %H:%M:%S', errors='coerce')
-
-    df['แผนก'] = df.get('แผนก', pd.Series(['ไม่ระบุ']*len(df))).fillna('ไม่ระบุ')
-    df['สถานะ'] = df.get('สถานะ', pd.Series(['ไม่ระบุ']*len(df))).fillna('ไม่ระบุ')
-    df['Category'] = df.get('Category', pd.Series(['ไม่ระบุ']*len(df))).fillna('ไม่ระบุ')
-    df['Sub Category'] = df.get('Sub Category', pd.Series(['ไม่ระบุ']*len(df))).fillna('ไม่ระบุ')
-
-    now = pd.Timestamp.now()
-    if 'SLA' in df.columns:
-        df['sla_limit_minutes'] = df['SLA'].apply(parse_sla_to_mins)
-        df['actual_minutes_spent'] = df.apply(lambda row: calculate_actual_mins(row, now), axis=1)
-        df['sla_status_label'] = df.apply(get_sla_status_label, axis=1)
-    else:
-        df['sla_status_label'] = 'ไม่พบข้อมูล SLA'
-    return df
+    return load_prepared(url, SNAPSHOT_PATH, INGEST_CHUNK_MB)
+
+# snapshot จาก precompute worker: key ด้วย version จึงไม่ต้องมี TTL
+@st.cache_data(max_entries=2)
+def load_shared_snapshot(shared_dir, version):
+    df, closed_cube, meta = SharedSnapshotDir(shared_dir).read(version)
+    # computed_at เป็นเวลาของ worker -> จดเวลาที่อ่านจริงไว้แยก เพื่อแยก cache hit/miss ได้
+    return df, closed_cube, {**meta, "read_at": time.time()}
+
+def load_site(source):
+    return load_prepared(source.location, site_snapshot_path(SNAPSHOT_PATH, source.site), INGEST_CHUNK_MB, SOURCE_TIMEOUT_SECONDS)
+
+# loader หลายไซต์ตัวเดียวต่อ process: cache ผลแยกต่อไซต์ (TTL เท่ากัน) ใช้ร่วมกันทุก session
+@st.cache_resource
+def get_multi_loader():
+    return MultiSourceLoader(SOURCES, load_site, ttl=DATA_TTL_SECONDS, timeout=SOURCE_TIMEOUT_SECONDS)
+
+# refresher ตัวเดียวต่อ process ใช้ร่วมกันทุก session -> ไม่เกิดการรีเฟรชซ้ำซ้อน
+@st.cache_resource
+def get_refresher(url):
+    load_fn = get_multi_loader().load if SOURCES else lambda: load_prepared(url, SNAPSHOT_PATH, INGEST_CHUNK_MB)
+    return BackgroundRefresher(load_fn, ttl=DATA_TTL_SECONDS)
+
+# ==========================================
+# 6. Dashboard Layout (แยกเป็น Fragment)
+#    คลิกกราฟแผนก -> rerun เฉพาะ dashboard_fragment, เปลี่ยนหน้าตาราง -> rerun เฉพาะ raw_log_fragment
+#    ไม่ต้องฉีด CSS / โหลดข้อมูล / กรอง Sidebar ใหม่ และไม่ส่งส่วนอื่นของหน้าไป browser ซ้ำ
+# ==========================================
+def fragment_profiler(parent, name):
+    # ถ้า parent ปิดไปแล้ว แปลว่า fragment นี้ถูก rerun เดี่ยว ๆ -> จับเวลาเป็นรอบของ fragment เอง
+    return RerunProfiler(scope=f"fragment:{name}") if parent.closed else parent
+
+def finish_fragment_profiler(profiler, parent):
+    if profiler is parent: return
+    profiler.close()
+    if PROFILE_LOG_PATH: profiler.write(PROFILE_LOG_PATH)
+    if st.session_state.get("is_admin"): st.caption(f"⏱️ {profiler.scope} rerun ใช้เวลา {profiler.total_ms:,.0f} ms")
+
+@st.fragment
+def dashboard_fragment(df, cube_filtered, filter_args, breach_index, parent_profiler):
+    profiler = fragment_profiler(parent_profiler, "dashboard")
+    try:
+        kpi_zone = st.container()
+        breach_zone = st.container()
+        trend_zone = st.container()
+        donuts_zone = st.container()
+        dept_zone = st.container()
+        table_zone = st.container()
+
+        cube_interactive = cube_filtered
+        clicked_dept = None
+
+        # --- กราฟแผนก ---
+        with dept_zone, profiler.stage("dept_zone", rows=len(cube_filtered)):
+            section_title("ปริมาณงานแยกตามแผนก (Department Performance)", "🏢")
+            dept_df = cube_counts(cube_filtered, 'แผนก', ['Department', 'Count'])
+            # กราฟ cache ตามข้อมูลที่สรุปแล้ว ถ้าข้อมูลไม่เปลี่ยนก็ไม่สร้างใหม่
+            fig_dept = dept_figure(dept_df)
+            dept_event = st.plotly_chart(fig_dept, use_container_width=True, on_select="rerun", selection_mode="points", theme=None)
+        
+            if dept_event and len(dept_event.selection.get("points", [])) > 0:
+                clicked_dept = dept_event.selection["points"][0]["y"]
+                cube_interactive = cube_interactive[cube_interactive['แผนก'] == clicked_dept]
+                st.success(f"🎯 โฟกัสข้อมูลแผนก: **{clicked_dept}**")
+
+        # --- เติม KPI ---
+        with kpi_zone, profiler.stage("kpi_zone", rows=len(cube_interactive)):
+            c1, c2, c3, c4, c5 = st.columns(5)
+            total = cube_total(cube_interactive)
+            closed = cube_closed_total(cube_interactive)
+            open_cases = total - closed
+            sla_breached = cube_total(cube_interactive, 'sla_status_label', ['❌ เกิน SLA (ปิดแล้ว)', '🔥 เกินกำหนด (รีบปิดด่วน!)'])
+            sla_warning = cube_total(cube_interactive, 'sla_status_label', ['⚠️ ใกล้หลุด SLA (เร่งมือ)'])
+
+            with c1: create_kpi_card("Total Cases", f"{total:,}", "#3B82F6", "#EFF6FF")
+            with c2: create_kpi_card("Completed", f"{closed:,}", "#10B981", "#ECFDF5")
+            with c3: create_kpi_card("In Progress", f"{open_cases:,}", "#F59E0B", "#FFFBEB")
+            with c4: create_kpi_card("SLA Breached", f"{sla_breached:,}", "#EF4444", "#FEF2F2")
+            with c5: create_kpi_card("SLA Warning", f"{sla_warning:,}", "#FACC15", "#FEFCE8")
+
+        # --- ⏰ เคสที่ใกล้หลุด SLA ถัดไป (ตอบจาก BreachIndex ไม่ต้องเรียงเคสเปิดทั้งหมด) ---
+        with breach_zone, profiler.stage("breach_zone", rows=len(breach_index)):
+            section_title("เคสที่ใกล้หลุด SLA ถัดไป (Next to Breach)", "⏰")
+            # ดัชนีแบ่งกลุ่มตามไซต์/แผนก/สถานะ -> ใช้ตัวกรองเหล่านี้ได้ ส่วนช่วงวันที่และเกณฑ์ SLA ไม่ใช้กับส่วนนี้
+            breach_filters = {
+                SITE_COL: filter_args[5], 'แผนก': [clicked_dept] if clicked_dept is not None else filter_args[2], 'สถานะ': filter_args[3],
+            }
+            st.caption("แสดงเคสที่ยังเปิดอยู่ทั้งหมดตามไซต์/แผนก/สถานะที่เลือก (ไม่ใช้ตัวกรองช่วงเวลาและเกณฑ์ SLA)")
+            now = pd.Timestamp.now()
+            col_next, col_dept = st.columns([3, 2])
+            with col_next:
+                top_n = st.selectbox("จำนวนเคส", [5, 10, 20, 50], index=1, key="breach_top_n")
+                next_df = breach_index.next_to_breach(now, top_n, breach_filters)
+                next_df['เหลือเวลา'] = next_df['minutes_left'].map(format_countdown)
+                next_df.columns = ['หมายเลข Case', 'แผนก', 'ครบกำหนด SLA', 'minutes_left', 'เหลือเวลา']
+                st.dataframe(next_df.drop(columns=['minutes_left']), use_container_width=True, hide_index=True)
+            with col_dept:
+                dept_df = breach_index.dept_countdowns(now, breach_filters)
+                dept_df['เหลือเวลา'] = dept_df['minutes_left'].map(format_countdown)
+                dept_df.columns = ['แผนก', 'เกินแล้ว', 'รอดำเนินการ', 'เคสถัดไป', 'minutes_left', 'เหลือเวลา']
+                st.dataframe(dept_df.drop(columns=['minutes_left']), use_container_width=True, hide_index=True)
+
+        # --- Trend ---
+        with trend_zone, profiler.stage("trend_zone", rows=len(cube_interactive)):
+            trend_df = cube_counts(cube_interactive, 'Received_Date', ['Received_Date', 'Cases'], by_count=False)
+            trend_df, bucket_th, bucket_en = bucket_trend(trend_df)
+            section_title(f"ปริมาณเคสราย{bucket_th} ({bucket_en} Volume Trend)", "📈")
+            if not trend_df.empty:
+                fig_trend = trend_figure(trend_df, bucket_en != 'Daily')
+                st.plotly_chart(fig_trend, use_container_width=True, theme=None)
+
+        # --- 💥 กราฟวงกลม 2 อัน (แก้ไม้ตาย: เพิ่ม Height และถ่าง Margin บน-ล่างสุดๆ) ---
+        with donuts_zone, profiler.stage("donuts_zone", rows=len(cube_interactive)):
+            col_pie1, col_pie2 = st.columns(2)
+        
+            with col_pie1:
+                section_title("สัดส่วนสถานะงาน (Status)", "📌")
+                status_df = cube_counts(cube_interactive, 'สถานะ', ['Status', 'Count'])
+                fig_status = donut_figure(status_df, 'Status', STATUS_COLOR_MAP)
+                st.plotly_chart(fig_status, use_container_width=True, theme=None)
+
+            with col_pie2:
+                section_title("สัดส่วนสถานะ SLA", "⏱️")
+                sla_df = cube_counts(cube_interactive, 'sla_status_label', ['SLA_Status', 'Count'])
+                fig_sla = donut_figure(sla_df, 'SLA_Status', SLA_COLOR_MAP)
+                st.plotly_chart(fig_sla, use_container_width=True, theme=None)
+
+        # --- โซนตาราง ---
+        with table_zone, profiler.stage("table_zone", rows=len(df)):
+            st.markdown("---")
+            section_title("สรุปหมวดหมู่ปัญหา (Category Distribution)", "📑")
+            if not cube_interactive.empty:
+                cat_sub_df = cube_counts(cube_interactive, ['Category', 'Sub Category'], ['Category', 'Sub Category', 'จำนวนเคส'])
+                max_val = int(cat_sub_df['จำนวนเคส'].max()) if not cat_sub_df.empty else 100
+                with profiler.stage("table_serialize:category", rows=len(cat_sub_df)):
+                    st.dataframe(
+                        cat_sub_df, 
+                        use_container_width=True, height=400, hide_index=True,
+                        column_config={"จำนวนเคส": st.column_config.ProgressColumn("จำนวนเคส", format="%d", min_value=0, max_value=max_val)}
+                    )
+        
+            st.markdown("<br>", unsafe_allow_html=True)
+
+            section_title("รายละเอียดเคสทั้งหมด (Raw Data Log)", "🔍")
+            # ตารางดิบเป็นส่วนเดียวที่ยังต้องกรองข้อมูลระดับแถว
+            table_df = filter_frame(df, *filter_args)
+            if clicked_dept is not None: table_df = table_df[table_df['แผนก'] == clicked_dept]
+            raw_log_fragment(table_df, profiler)
+    except Exception as e:
+        st.error(f"เกิดข้อผิดพลาดในการรันระบบ: {e}")
+    finish_fragment_profiler(profiler, parent_profiler)
+
+@st.fragment
+def raw_log_fragment(table_df, parent_profiler):
+    profiler = fragment_profiler(parent_profiler, "raw_log")
+    try:
+        if st.toggle("📄 แบ่งหน้า (ส่งเฉพาะหน้าที่แสดง)", value=True, key="table_paginate"):
+            t1, t2, t3, t4 = st.columns([3, 2, 1, 1])
+            with t1: search = st.text_input("🔎 ค้นหา (หมายเลข Case / Category)", key="table_search")
+            sort_cols = [c for c in DISPLAY_COLS if SORT_KEYS.get(c, c) in table_df.columns]
+            with t2: sort_col = st.selectbox("↕️ เรียงตาม", [None] + sort_cols, format_func=lambda c: "ไม่เรียง" if c is None else c, key="table_sort")
+            with t3: descending = st.toggle("มาก → น้อย", key="table_desc")
+            with t4: page_size = st.selectbox("ต่อหน้า", PAGE_SIZES, index=1, key="table_page_size")
+
+            page_df, total_rows, pages = query_page(table_df, search, sort_col, not descending, st.session_state.get("table_page", 1), page_size)
+            if st.session_state.get("table_page", 1) > pages: st.session_state["table_page"] = pages
+
+            p1, p2 = st.columns([1, 5])
+            with p1: page = st.number_input(f"หน้า (จาก {pages:,})", min_value=1, max_value=pages, step=1, key="table_page")
+            first_row = (page - 1) * page_size + 1 if total_rows else 0
+            with p2: st.caption(f"แสดงแถว {first_row:,}–{first_row + len(page_df) - 1 if total_rows else 0:,} จากทั้งหมด {total_rows:,} รายการ")
+            with profiler.stage("table_serialize:raw_log", rows=len(page_df)):
+                st.dataframe(page_df, use_container_width=True, height=500, hide_index=True)
+        else:
+            table_df = table_df.copy()
+            if 'วัน / เวลา (รับเรื่องร้องขอ)' in table_df.columns: table_df['วันที่รับเรื่อง'] = table_df['วัน / เวลา (รับเรื่องร้องขอ)']
+            available_cols = [c for c in DISPLAY_COLS if c in table_df.columns]
+            with profiler.stage("table_serialize:raw_log", rows=len(table_df)):
+                st.dataframe(table_df[available_cols], use_container_width=True, height=500, hide_index=True)
+    except Exception as e:
+        st.error(f"เกิดข้อผิดพลาดในการรันระบบ: {e}")
+    finish_fragment_profiler(profiler, parent_profiler)
+
+# ดัชนีเส้นตาย SLA ตัวเดียวต่อ process (แบ่งกลุ่มตามไซต์/แผนก/สถานะ กรองตอน query) อัปเดตเฉพาะเคสที่เปิด/ปิด/เปลี่ยน
+@st.cache_resource
+def get_breach_index():
+    return BreachIndex()
+
+profiler = RerunProfiler()
 
 try:
-    df = load_and_prep_data(SHEET_URL)
+    shared_version = SharedSnapshotDir(SHARED_DIR).latest_version() if SHARED_DIR else None
+    refresher = get_refresher(SHEET_URL) if REFRESH_MODE == "background" and not shared_version else None
+    multi_loader = get_multi_loader() if SOURCES and not shared_version and not refresher else None
+    load_source = f"shared:{shared_version}" if shared_version else f"sites:{len(SOURCES)}" if SOURCES else "sheet"
+    with profiler.stage("load", source=load_source) as load_stage:
+        load_called_at = time.time()
+        if shared_version: df, closed_cube, load_meta = load_shared_snapshot(SHARED_DIR, shared_version)
+        elif refresher:
+            df, closed_cube, load_meta = refresher.get()
+            # ข้อมูลชุดเดียวกันแชร์ทุก session -> copy ก่อนคำนวณอายุเคส (แก้ไขในตัว)
+            df = df.copy()
+        elif multi_loader:
+            df, closed_cube, load_meta = multi_loader.load()
+            df = df.copy()
+        else: df, closed_cube, load_meta = load_and_prep_data(SHEET_URL)
+        # ถ้าฟังก์ชันถูกรันจริงระหว่างการเรียกครั้งนี้ แปลว่า cache miss
+        load_stage["cache"] = "miss" if load_meta.get("read_at", load_meta["computed_at"]) >= load_called_at else "hit"
+        load_stage["rows"] = len(df)
+    if load_stage["cache"] == "miss":
+        for name, ms in load_meta["timings"].items(): profiler.record(f"load:{name}", ms, rows=len(df))
+
+    with profiler.stage("age_open_tickets", rows=len(df)):
+        df = age_open_tickets(df, pd.Timestamp.now())
+    # ตัวกรอง/KPI/กราฟทั้งหมดตอบจาก cube (จำนวนกลุ่ม) แทนการสแกนข้อมูลดิบทุกแถว
+    with profiler.stage("cube") as cube_stage:
+        cube = combine_cubes(closed_cube, build_open_cube(df))
+        cube_stage["rows"] = len(cube)
     
     # ==========================================
-    # 6. Sidebar Filter
+    # 7. Sidebar Filter
     # ==========================================
     
     if st.sidebar.button("🚪 ล็อกเอาท์ (Logout)", use_container_width=True):
@@ -179,175 +386,66 @@ try:
         
     st.sidebar.markdown("<h2 style='margin-top: 15px;'>🎯 ตัวกรองข้อมูล</h2>", unsafe_allow_html=True)
     st.sidebar.markdown("<hr style='margin-top: 5px; margin-bottom: 20px;'>", unsafe_allow_html=True)
+    if load_meta["sync_report"]: st.sidebar.caption(f"🔄 ซิงก์ล่าสุด: {load_meta['sync_report']}")
+    if load_meta.get("ingest_report"): st.sidebar.caption(f"📥 {load_meta['ingest_report']}")
+    for site, status in load_meta.get("sources", {}).items(): st.sidebar.caption(f"🌐 {site}: {status}")
+    if shared_version: st.sidebar.caption(f"🗂️ Snapshot: {shared_version}")
+    if refresher:
+        refresh_note = " · ⏳ กำลังรีเฟรชเบื้องหลัง" if refresher.refreshing else ""
+        st.sidebar.caption(f"🕒 อายุข้อมูล {refresher.age / 60:,.1f} นาที · รีเฟรชล่าสุดใช้ {refresher.last_duration:,.1f} s{refresh_note}")
+        if refresher.last_error: st.sidebar.warning(f"⚠️ รีเฟรชล่าสุดไม่สำเร็จ กำลังแสดงข้อมูลชุดก่อนหน้า: {refresher.last_error}")
+    st.sidebar.caption(f"💾 หน่วยความจำข้อมูล (ประมาณ): {load_meta['memory_before']:,.1f} MB → {load_meta['memory_after']:,.1f} MB")
+    if load_meta.get("peak_rss_after") is not None:
+        peak_before = load_meta.get("peak_rss_before")
+        peak_text = f"{peak_before:,.1f} MB → " if peak_before is not None else ""
+        peak_owner = "precompute worker" if shared_version else "process"
+        st.sidebar.caption(f"📈 RSS สูงสุดของ {peak_owner} (วัดจริง) ก่อน → หลังโหลด: {peak_text}{load_meta['peak_rss_after']:,.1f} MB")
     
-    min_date, max_date = df['Received_Date'].min(), df['Received_Date'].max()
-    date_range = st.sidebar.date_input("📅 ช่วงเวลา (Date Range)", value=(min_date, max_date), min_value=min_date, max_value=max_date)
-    start_date = date_range[0] if len(date_range) > 0 else min_date
-    end_date = date_range[1] if len(date_range) > 1 else start_date
-    df_date_filtered = df[(df['Received_Date'] >= start_date) & (df['Received_Date'] <= end_date)]
-
-    all_depts = sorted(df_date_filtered['แผนก'].unique())
-    all_status = sorted(df_date_filtered['สถานะ'].unique())
-    all_sla = sorted(df_date_filtered['sla_status_label'].unique())
-
-    selected_depts = st.sidebar.multiselect("🏢 แผนก (Department):", all_depts)
-    selected_status = st.sidebar.multiselect("📌 สถานะ (Status):", all_status)
-    selected_sla = st.sidebar.multiselect("⏱️ เกณฑ์ SLA:", all_sla)
-
-    df_filtered = df_date_filtered.copy()
-    if selected_depts: df_filtered = df_filtered[df_filtered['แผนก'].isin(selected_depts)]
-    if selected_status: df_filtered = df_filtered[df_filtered['สถานะ'].isin(selected_status)]
-    if selected_sla: df_filtered = df_filtered[df_filtered['sla_status_label'].isin(selected_sla)]
+    with profiler.stage("filter", rows=len(cube)):
+        min_date, max_date = cube['Received_Date'].min().date(), cube['Received_Date'].max().date()
+        date_range = st.sidebar.date_input("📅 ช่วงเวลา (Date Range)", value=(min_date, max_date), min_value=min_date, max_value=max_date)
+        start_date = date_range[0] if len(date_range) > 0 else min_date
+        end_date = date_range[1] if len(date_range) > 1 else start_date
+        cube_date_filtered = filter_frame(cube, start_date, end_date)
+
+        all_sites = sorted(cube_date_filtered[SITE_COL].unique()) if SITE_COL in cube.columns else []
+        all_depts = sorted(cube_date_filtered['แผนก'].unique())
+        all_status = sorted(cube_date_filtered['สถานะ'].unique())
+        all_sla = sorted(cube_date_filtered['sla_status_label'].unique())
+
+        selected_sites = st.sidebar.multiselect("🌐 ไซต์ (Site):", all_sites) if all_sites else []
+        selected_depts = st.sidebar.multiselect("🏢 แผนก (Department):", all_depts)
+        selected_status = st.sidebar.multiselect("📌 สถานะ (Status):", all_status)
+        selected_sla = st.sidebar.multiselect("⏱️ เกณฑ์ SLA:", all_sla)
+
+        filter_args = (start_date, end_date, selected_depts, selected_status, selected_sla, selected_sites)
+        cube_filtered = filter_frame(cube, *filter_args)
+
+    with profiler.stage("breach_index") as breach_stage:
+        breach_index = get_breach_index()
+        # ข้อมูลชุดเดิม (computed_at เดิม) -> sync ไม่ต้องทำอะไร
+        breach_stage["added"], breach_stage["removed"] = breach_index.sync(df, load_meta["computed_at"])
+        breach_stage["rows"] = len(breach_index)
 
     # ==========================================
-    # 7. Dashboard Layout
+    # 8. แสดงผล Dashboard
     # ==========================================
     st.markdown("<h1>📊 Helpdesk Enterprise Analytics</h1>", unsafe_allow_html=True)
     st.markdown("<p style='color: #64748B; margin-top: -15px; margin-bottom: 25px;'>คลิกที่แท่งกราฟแผนก เพื่อดูข้อมูลเจาะลึก | ดับเบิลคลิกเพื่อยกเลิก</p>", unsafe_allow_html=True)
 
-    kpi_zone = st.container()
-    trend_zone = st.container()
-    donuts_zone = st.container()
-    dept_zone = st.container()
-    table_zone = st.container()
-
-    pro_layout = dict(
-        paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)",
-        font=dict(family="Prompt", color="#0F172A", size=14),
-        xaxis=dict(color="#0F172A", showgrid=False, tickfont=dict(size=13, weight="bold"), automargin=True), 
-        yaxis=dict(color="#0F172A", showgrid=True, gridcolor="#E2E8F0", gridwidth=1, tickfont=dict(size=13, weight="bold"), automargin=True), 
-        margin=dict(t=40, b=40, l=40, r=40) 
-    )
-
-    df_interactive = df_filtered.copy() 
-
-    # --- กราฟแผนก ---
-    with dept_zone:
-        section_title("ปริมาณงานแยกตามแผนก (Department Performance)", "🏢")
-        dept_df = df_filtered['แผนก'].value_counts().reset_index()
-        dept_df.columns = ['Department', 'Count']
-        chart_height = max(500, len(dept_df) * 45) 
-        
-        fig_dept = px.bar(dept_df, x='Count', y='Department', orientation='h', text='Count')
-        fig_dept.update_traces(
-            marker_color='#3B82F6', marker_line_color='#2563EB', marker_line_width=1,
-            texttemplate='<b>%{x}</b>', textposition='outside', textfont=dict(color='#0F172A', size=15), 
-            cliponaxis=False 
-        )
-        fig_dept.update_layout(**pro_layout)
-        fig_dept.update_layout(height=chart_height, showlegend=False, xaxis_title="", yaxis_title="")
-        fig_dept.update_yaxes(categoryorder='total ascending')
-        fig_dept.update_xaxes(range=[0, dept_df['Count'].max() * 1.15] if not dept_df.empty else [0, 100]) 
-        
-        dept_event = st.plotly_chart(fig_dept, use_container_width=True, on_select="rerun", selection_mode="points", theme=None)
-        
-        if dept_event and len(dept_event.selection.get("points", [])) > 0:
-            clicked_dept = dept_event.selection["points"][0]["y"]
-            df_interactive = df_interactive[df_interactive['แผนก'] == clicked_dept]
-            st.success(f"🎯 โฟกัสข้อมูลแผนก: **{clicked_dept}**")
-
-    # --- เติม KPI ---
-    with kpi_zone:
-        c1, c2, c3, c4, c5 = st.columns(5)
-        total = len(df_interactive)
-        closed = len(df_interactive[df_interactive['สถานะ'].isin(['ปิด Case', 'เสร็จสิ้น'])])
-        open_cases = total - closed
-        sla_breached = len(df_interactive[df_interactive['sla_status_label'].isin(['❌ เกิน SLA (ปิดแล้ว)', '🔥 เกินกำหนด (รีบปิดด่วน!)'])])
-        sla_warning = len(df_interactive[df_interactive['sla_status_label'] == '⚠️ ใกล้หลุด SLA (เร่งมือ)'])
-
-        with c1: create_kpi_card("Total Cases", f"{total:,}", "#3B82F6", "#EFF6FF")
-        with c2: create_kpi_card("Completed", f"{closed:,}", "#10B981", "#ECFDF5")
-        with c3: create_kpi_card("In Progress", f"{open_cases:,}", "#F59E0B", "#FFFBEB")
-        with c4: create_kpi_card("SLA Breached", f"{sla_breached:,}", "#EF4444", "#FEF2F2")
-        with c5: create_kpi_card("SLA Warning", f"{sla_warning:,}", "#FACC15", "#FEFCE8")
-
-    # --- Trend ---
-    with trend_zone:
-        section_title("ปริมาณเคสรายวัน (Daily Volume Trend)", "📈")
-        trend_df = df_interactive.groupby('Received_Date').size().reset_index(name='Cases')
-        if not trend_df.empty:
-            fig_trend = go.Figure()
-            fig_trend.add_trace(go.Scatter(
-                x=trend_df['Received_Date'], y=trend_df['Cases'], mode='lines+markers+text',
-                text=trend_df['Cases'], textposition='top center', textfont=dict(color='#0F172A', size=15, weight="bold"),
-                line=dict(color='#2563EB', width=3, shape='spline'), 
-                marker=dict(size=8, color='#FFFFFF', line=dict(width=2, color='#2563EB')),
-                fill='tozeroy', fillcolor='rgba(59, 130, 246, 0.1)',
-                cliponaxis=False 
-            ))
-            fig_trend.update_layout(**pro_layout)
-            fig_trend.update_layout(height=450, xaxis_title="", yaxis_title="") 
-            fig_trend.update_yaxes(range=[0, trend_df['Cases'].max() * 1.3]) 
-            st.plotly_chart(fig_trend, use_container_width=True, theme=None)
-
-    # --- 💥 กราฟวงกลม 2 อัน (แก้ไม้ตาย: เพิ่ม Height และถ่าง Margin บน-ล่างสุดๆ) ---
-    with donuts_zone:
-        col_pie1, col_pie2 = st.columns(2)
-        
-        with col_pie1:
-            section_title("สัดส่วนสถานะงาน (Status)", "📌")
-            status_df = df_interactive['สถานะ'].value_counts().reset_index()
-            status_df.columns = ['Status', 'Count']
-            status_color_map = {
-                'ปิด Case': '#10B981', 'เสร็จสิ้น': '#10B981', 
-                'รับเรื่องร้องขอ': '#F59E0B', 'กำลังดำเนินการ': '#3B82F6', 'ไม่ระบุ': '#94A3B8'
-            }
-            fig_status = px.pie(status_df, names='Status', values='Count', hole=0.55, color='Status', color_discrete_map=status_color_map)
-            fig_status.update_traces(
-                textposition='outside', textinfo='percent+label', 
-                textfont=dict(size=14, color='#0F172A', weight="bold"),
-                marker=dict(line=dict(color='#FFFFFF', width=2))
-            )
-            fig_status.update_layout(**pro_layout)
-            # 💥 เพิ่มความสูงเป็น 600px และถ่างขอบบน-ล่างให้กว้างถึง 150px!
-            fig_status.update_layout(height=600, showlegend=False, margin=dict(t=150, b=150, l=150, r=150))
-            st.plotly_chart(fig_status, use_container_width=True, theme=None)
-
-        with col_pie2:
-            section_title("สัดส่วนสถานะ SLA", "⏱️")
-            sla_df = df_interactive['sla_status_label'].value_counts().reset_index()
-            sla_df.columns = ['SLA_Status', 'Count']
-            color_map = {
-                '✅ ภายใน SLA': '#10B981', '🟢 ปกติ': '#34D399', 
-                '⚠️ ใกล้หลุด SLA (เร่งมือ)': '#F59E0B', 
-                '🔥 เกินกำหนด (รีบปิดด่วน!)': '#EF4444', '❌ เกิน SLA (ปิดแล้ว)': '#B91C1C'
-            }
-            fig_sla = px.pie(sla_df, names='SLA_Status', values='Count', hole=0.55, color='SLA_Status', color_discrete_map=color_map)
-            fig_sla.update_traces(
-                textposition='outside', textinfo='percent+label',
-                textfont=dict(size=14, color='#0F172A', weight="bold"),
-                marker=dict(line=dict(color='#FFFFFF', width=2))
-            )
-            fig_sla.update_layout(**pro_layout)
-            # 💥 เพิ่มความสูงเป็น 600px และถ่างขอบบน-ล่างให้กว้างถึง 150px!
-            fig_sla.update_layout(height=600, showlegend=False, margin=dict(t=150, b=150, l=150, r=150))
-            st.plotly_chart(fig_sla, use_container_width=True, theme=None)
-
-    # --- โซนตาราง ---
-    with table_zone:
-        st.markdown("---")
-        section_title("สรุปหมวดหมู่ปัญหา (Category Distribution)", "📑")
-        if not df_interactive.empty:
-            cat_sub_df = df_interactive.groupby(['Category', 'Sub Category']).size().reset_index(name='จำนวนเคส')
-            cat_sub_df = cat_sub_df.sort_values('จำนวนเคส', ascending=False)
-            max_val = int(cat_sub_df['จำนวนเคส'].max()) if not cat_sub_df.empty else 100
-            st.dataframe(
-                cat_sub_df, 
-                use_container_width=True, height=400, hide_index=True,
-                column_config={"จำนวนเคส": st.column_config.ProgressColumn("จำนวนเคส", format="%d", min_value=0, max_value=max_val)}
-            )
-        
-        st.markdown("<br>", unsafe_allow_html=True)
-
-        section_title("รายละเอียดเคสทั้งหมด (Raw Data Log)", "🔍")
-        display_cols = ['หมายเลข Case', 'วันที่รับเรื่อง', 'แผนก', 'Category', 'Sub Category', 'สถานะ', 'SLA', 'sla_status_label']
-        table_df = df_interactive.copy()
-        if 'วัน / เวลา (รับเรื่องร้องขอ)' in table_df.columns: table_df['วันที่รับเรื่อง'] = table_df['วัน / เวลา (รับเรื่องร้องขอ)']
-        available_cols = [c for c in display_cols if c in table_df.columns]
-        
-        st.dataframe(table_df[available_cols], use_container_width=True, height=500, hide_index=True)
+    dashboard_fragment(df, cube_filtered, filter_args, breach_index, profiler)
 
 except Exception as e:
     st.error(f"เกิดข้อผิดพลาดในการรันระบบ: {e}")
 
-
+# ==========================================
+# 9. ⏱️ Profiling (เวลาแต่ละขั้นตอนของ rerun นี้)
+# ==========================================
+profiler.close()
+if PROFILE_LOG_PATH:
+    profiler.write(PROFILE_LOG_PATH)
+
+if st.session_state.get("is_admin"):
+    with st.sidebar.expander("⏱️ Profiling (Admin)"):
+        st.caption(f"rerun {profiler.run_id} ใช้เวลารวม {profiler.total_ms:,.0f} ms")
+        st.dataframe(profiler.as_frame(), use_container_width=True, hide_index=True)
@@ -0,0 +1,71 @@
+import logging
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+
+# ==========================================
+# Stale-while-revalidate: เสิร์ฟข้อมูลชุดเดิมไปก่อน ระหว่างที่ thread เบื้องหลังโหลดชุดใหม่
+# (1 instance ต่อ process ใช้ร่วมกันทุก session ผ่าน st.cache_resource)
+# ==========================================
+class BackgroundRefresher:
+    def __init__(self, load_fn, ttl=300, retry_after=60):
+        self._load_fn = load_fn
+        self.ttl = ttl
+        self.retry_after = retry_after
+        self._lock = threading.Lock()
+        self._thread = None
+        self._value = None
+        self._last_attempt = 0.0
+        self.loaded_at = None
+        self.last_duration = None
+        self.last_error = None
+
+    @property
+    def age(self):
+        return None if self.loaded_at is None else time.time() - self.loaded_at
+
+    @property
+    def refreshing(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def get(self):
+        with self._lock:
+            if self._value is None:
+                # ครั้งแรกยังไม่มีอะไรให้เสิร์ฟ -> โหลดแบบรอ (session อื่นรอที่ lock ไม่โหลดซ้ำ)
+                self._store(*self._timed_load())
+            elif self._should_refresh():
+                self._last_attempt = time.time()
+                self._thread = threading.Thread(target=self._refresh, name="helpdesk-refresh", daemon=True)
+                self._thread.start()
+            return self._value
+
+    def _should_refresh(self):
+        if self.refreshing or self.age < self.ttl:
+            return False
+        # รีเฟรชล้มเหลว -> เว้นช่วงก่อนลองใหม่ ไม่ยิงซ้ำทุก rerun
+        return time.time() - self._last_attempt >= self.retry_after
+
+    def _timed_load(self):
+        started = time.perf_counter()
+        value = self._load_fn()
+        return value, time.perf_counter() - started
+
+    def _store(self, value, duration):
+        self._value = value
+        self.loaded_at = time.time()
+        self.last_duration = duration
+        self.last_error = None
+
+    def _refresh(self):
+        try:
+            value, duration = self._timed_load()
+        except Exception as e:
+            # เก็บข้อมูลชุดเดิมที่ดีไว้ แค่จำ error ไว้แสดงผล
+            log.exception("background refresh failed; serving the previous data")
+            with self._lock:
+                self.last_error = e
+            return
+        with self._lock:
+            self._store(value, duration)
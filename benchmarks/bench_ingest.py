@@ -0,0 +1,91 @@
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from chunked_ingest import read_prepared_chunks  # noqa: E402
+from data_prep import DATETIME_FORMAT, compact_schema, prep_static, read_source  # noqa: E402
+
+STATUSES = ['ปิด Case', 'เสร็จสิ้น', 'รับเรื่องร้องขอ', 'กำลังดำเนินการ', None]
+SLA_TEXTS = ['1 วัน', '4 ชั่วโมง', '30 นาที', '2 ชั่วโมง 30 นาที', None]
+
+
+def make_csv(path, n, seed=0):
+    # มีคอลัมน์ที่ Dashboard ไม่ใช้ (รายละเอียด) ปนมาเหมือน Sheet จริง
+    rng = np.random.default_rng(seed)
+    received = pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 365 * 24 * 60, n), unit='min')
+    closed = received + pd.to_timedelta(rng.integers(1, 5 * 24 * 60, n), unit='min')
+    status = rng.choice(STATUSES, n)
+    pd.DataFrame({
+        'หมายเลข Case': [f'C{i:07d}' for i in range(n)],
+        'วัน / เวลา (รับเรื่องร้องขอ)': received.strftime(DATETIME_FORMAT),
+        'วัน / เวลา (ปิดเคส)': np.where(np.isin(status, STATUSES[:2]), closed.strftime(DATETIME_FORMAT), None),
+        'แผนก': rng.choice(['IT', 'HR', 'บัญชี', 'ขาย', None], n),
+        'สถานะ': status,
+        'Category': rng.choice(['Hardware', 'Software', 'Network'], n),
+        'Sub Category': rng.choice(['A', 'B', 'C'], n),
+        'SLA': rng.choice(SLA_TEXTS, n),
+        'รายละเอียด': rng.choice(['เครื่องพิมพ์ใช้งานไม่ได้ ' * 4, 'ขอสิทธิ์เข้าระบบ ' * 6], n),
+    }).to_csv(path, index=False)
+
+
+def load(path, chunk_mb):
+    if chunk_mb:
+        return read_prepared_chunks(path, chunk_mb)[0]
+    return compact_schema(prep_static(read_source(path)))
+
+
+def vm_hwm_mb():
+    # RSS สูงสุดของ process นี้ (Linux) -- ru_maxrss อาจติดค่าจาก process แม่มาตอน fork
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmHWM:'):
+                return int(line.split()[1]) / 1024
+    raise RuntimeError("VmHWM not available")
+
+
+def peak_rss_mb(path, chunk_mb):
+    # วัดใน process ใหม่ทุกครั้ง (ค่าสูงสุดนับตลอดอายุ process)
+    out = subprocess.run(
+        [sys.executable, __file__, '--child', path, '--chunk-mb', str(chunk_mb or 0)],
+        check=True, capture_output=True, text=True,
+    )
+    return float(out.stdout.strip())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="เทียบ RSS สูงสุดที่วัดจริง: โหลด CSV ทีเดียว กับแบบทีละ chunk (ขนาด chunk โดยประมาณ)")
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--chunk-mb', type=float, nargs='+', default=[16, 64])
+    parser.add_argument('--child')
+    args = parser.parse_args()
+
+    if args.child:
+        load(args.child, args.chunk_mb[0])
+        print(vm_hwm_mb())
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'helpdesk.csv')
+        make_csv(path, args.rows)
+        print(f"{args.rows:,} rows, CSV {os.path.getsize(path) / 1024**2:,.1f} MB")
+        expected = load(path, None)
+        # peak RSS วัดจริง ส่วน chunk/retained เป็นค่าประมาณจาก memory_usage ที่ IngestReport รายงาน
+        print(f"{'mode':>16} {'peak RSS (MB)':>14} {'chunk est.':>11} {'retained est.':>14}  identical")
+        print(f"{'one-shot':>16} {peak_rss_mb(path, None):>14,.1f} {'-':>11} {'-':>14}  -")
+        for chunk_mb in args.chunk_mb:
+            df, report = read_prepared_chunks(path, chunk_mb)
+            identical = df.equals(expected) and (df.dtypes == expected.dtypes).all()
+            print(f"{f'chunked {chunk_mb:g} MB':>16} {peak_rss_mb(path, chunk_mb):>14,.1f} "
+                  f"{report.chunk_mb:>11,.1f} {report.retained_mb:>14,.1f}  {identical}")
+
+
+if __name__ == '__main__':
+    main()
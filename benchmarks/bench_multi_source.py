@@ -0,0 +1,84 @@
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_ingest import make_csv  # noqa: E402
+from data_prep import SITE_COL  # noqa: E402
+from loader import load_prepared  # noqa: E402
+from multi_source import MultiSourceLoader, Source  # noqa: E402
+
+
+class SlowHandler(SimpleHTTPRequestHandler):
+    # หน่วงเวลาตามชื่อไฟล์ (จำลอง Google Sheet แต่ละไซต์ที่ตอบช้าไม่เท่ากัน) ทำงานแบบ offline ทั้งหมด
+    delays = {}
+
+    def do_GET(self):
+        time.sleep(self.delays.get(os.path.basename(self.path), 0))
+        super().do_GET()
+
+    def log_message(self, *args):
+        pass
+
+
+def serve(directory):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), partial(SlowHandler, directory=directory))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="เทียบเวลาโหลดหลายไซต์: ทีละแหล่ง กับพร้อมกันบน thread pool (ผ่าน HTTP server ในเครื่อง)")
+    parser.add_argument('--sites', type=int, default=4)
+    parser.add_argument('--rows', type=int, default=50_000)
+    parser.add_argument('--delay', type=float, default=1.0, help="วินาทีที่ไซต์ i หน่วง = delay * i")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for i in range(args.sites):
+            make_csv(os.path.join(tmp, f'site{i + 1}.csv'), args.rows, seed=i)
+            SlowHandler.delays[f'site{i + 1}.csv'] = args.delay * (i + 1)
+        server = serve(tmp)
+        base = f"http://127.0.0.1:{server.server_port}"
+        sources = [Source(f'site{i + 1}', f"{base}/site{i + 1}.csv") for i in range(args.sites)]
+        load_site = lambda source, timeout=30: load_prepared(source.location, timeout=timeout)  # noqa: E731
+
+        started = time.perf_counter()
+        sequential = [load_site(s)[0] for s in sources]
+        t_seq = time.perf_counter() - started
+
+        loader = MultiSourceLoader(sources, load_site, ttl=300, timeout=30)
+        started = time.perf_counter()
+        merged, _, meta = loader.load()
+        t_par = time.perf_counter() - started
+        started = time.perf_counter()
+        loader.load()
+        t_cached = time.perf_counter() - started
+
+        per_site = merged.groupby(SITE_COL, observed=True).size()
+        match = all(
+            merged[merged[SITE_COL] == s.site].drop(columns=SITE_COL).reset_index(drop=True)
+            .astype(str).equals(df.astype(str)) for s, df in zip(sources, sequential)
+        ) and per_site.tolist() == [len(df) for df in sequential]
+        print(f"{args.sites} sites × {args.rows:,} rows, slowest site delay {args.delay * args.sites:.1f} s")
+        print(f"sequential {t_seq:6.2f} s | concurrent {t_par:6.2f} s | cached {t_cached * 1000:6.1f} ms | match {match}")
+
+        # ไซต์ที่ช้ากว่า timeout ไม่ถ่วงไซต์อื่น และถูกรายงานในสถานะ
+        slow = MultiSourceLoader(sources, load_site, ttl=300, timeout=args.delay * (args.sites - 0.5))
+        started = time.perf_counter()
+        partial_df, _, meta = slow.load()
+        print(f"timeout {slow.timeout:.1f} s -> {time.perf_counter() - started:.2f} s, "
+              f"{partial_df[SITE_COL].nunique()} of {args.sites} sites: {meta['sources'][sources[-1].site]}")
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sla_engine import (  # noqa: E402
+    apply_sla_columns, calculate_actual_mins, get_sla_status_label, parse_sla_to_mins,
+)
+
+SLA_TEXTS = ['1 วัน', '4 ชั่วโมง', '30 นาที', '2 ชั่วโมง 30 นาที', '3 วัน 12 ชั่วโมง', 'ไม่มี SLA', None]
+STATUSES = ['ปิด Case', 'เสร็จสิ้น', 'รับเรื่องร้องขอ', 'กำลังดำเนินการ', 'ไม่ระบุ']
+
+
+def make_frame(n, seed=0):
+    rng = np.random.default_rng(seed)
+    received = pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 365 * 24 * 60, n), unit='min')
+    closed = received + pd.to_timedelta(rng.integers(1, 5 * 24 * 60, n), unit='min')
+    received = pd.Series(received).mask(rng.random(n) < 0.01)
+    closed = pd.Series(closed).mask(rng.random(n) < 0.05)
+    return pd.DataFrame({
+        'สถานะ': rng.choice(STATUSES, n),
+        'SLA': pd.Series(SLA_TEXTS, dtype=object).sample(n, replace=True, random_state=seed).to_numpy(),
+        'Received_DT': received,
+        'Closed_DT': closed,
+    })
+
+
+def rowwise(df, now):
+    df['sla_limit_minutes'] = df['SLA'].apply(parse_sla_to_mins)
+    df['actual_minutes_spent'] = df.apply(lambda row: calculate_actual_mins(row, now), axis=1)
+    df['sla_status_label'] = df.apply(get_sla_status_label, axis=1)
+    return df
+
+
+def timed(fn, df, now):
+    start = time.perf_counter()
+    out = fn(df.copy(), now)
+    return out, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="เทียบความเร็ว SLA แบบทีละแถว กับแบบทั้งคอลัมน์")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    now = pd.Timestamp('2025-01-01 12:00:00')
+    print(f"{'rows':>10} {'row-wise (s)':>14} {'vectorized (s)':>15} {'speedup':>9}  match")
+    for n in args.sizes:
+        df = make_frame(n)
+        old, t_old = timed(rowwise, df, now)
+        new, t_new = timed(apply_sla_columns, df, now)
+        cols = ['sla_limit_minutes', 'actual_minutes_spent', 'sla_status_label']
+        match = all(old[c].astype(new[c].dtype).equals(new[c]) for c in cols)
+        print(f"{n:>10,} {t_old:>14.3f} {t_new:>15.3f} {t_old / t_new:>8.1f}x  {match}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_ingest import make_csv  # noqa: E402
+from data_prep import SITE_COL  # noqa: E402
+from loader import load_prepared  # noqa: E402
+from multi_source import MultiSourceLoader, Source, concat_sites  # noqa: E402
+
+# ==========================================
+# ตรวจซ้ำกรณีที่เคยทำให้ MultiSourceLoader.load / concat_sites ล่ม (รันแบบ offline ได้ทั้งหมด)
+# python benchmarks/check_multi_source.py -> จบด้วย exit code 0 ถ้าผ่านทุกข้อ
+# ==========================================
+ROWS = 2_000
+
+
+def check_shared_inflight_load(path):
+    # หลาย session เรียก load() พร้อมกันตอนไซต์ยังไม่มีข้อมูล -> รอ future เดียวกัน เคยเจอ KeyError ตอนเก็บผลซ้ำ
+    def slow_load(source):
+        time.sleep(0.5)
+        return load_prepared(source.location)
+
+    loader = MultiSourceLoader([Source('A', path)], slow_load, ttl=300, timeout=30)
+    merges = []
+    merge = loader._merge
+    loader._merge = lambda: merges.append(1) or merge()
+    errors, rows = [], []
+
+    def session():
+        try:
+            rows.append(len(loader.load()[0]))
+        except Exception as e:
+            errors.append(repr(e))
+
+    threads = [threading.Thread(target=session) for _ in range(4)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    assert not errors, errors
+    assert rows == [ROWS] * 4, rows
+    assert len(merges) == 1, f"merged {len(merges)} times"
+    assert not loader._running, loader._running
+
+
+def check_timed_out_load_is_harvested_later(path):
+    # รอบแรกเกิน timeout -> รายงาน error และปล่อยโหลดต่อ, รอบถัดไปเก็บผลของ future เดิม (ไม่ยิงซ้ำ)
+    calls = []
+
+    def slow_load(source):
+        calls.append(source.site)
+        time.sleep(0.5)
+        return load_prepared(source.location)
+
+    loader = MultiSourceLoader([Source('A', path)], slow_load, ttl=300, timeout=0.1)
+    try:
+        loader.load()
+        raise AssertionError("first load should time out")
+    except RuntimeError:
+        pass
+    time.sleep(1)
+    df, _, meta = loader.load()
+    assert len(df) == ROWS and calls == ['A'], (len(df), calls)
+    assert '⚠️' not in meta["sources"]['A'], meta["sources"]
+
+
+def check_concat_sites_with_different_columns(path, no_sla_path):
+    # Sheet หนึ่งไม่มีคอลัมน์ SLA -> รวมได้ทั้งสองลำดับ คอลัมน์ครบ ค่าของไซต์ที่ไม่มีเป็นค่าว่าง
+    with_sla, without_sla = load_prepared(path)[0], load_prepared(no_sla_path)[0]
+    assert 'sla_limit_minutes' not in without_sla.columns
+    for frames in ({'A': with_sla, 'B': without_sla}, {'B': without_sla, 'A': with_sla}):
+        df = concat_sites(frames)
+        assert len(df) == 2 * ROWS
+        assert set(df.columns) == set(with_sla.columns) | {SITE_COL}, set(df.columns) ^ set(with_sla.columns)
+        assert list(df[SITE_COL].cat.categories) == list(frames)
+        a, b = df[df[SITE_COL] == 'A'], df[df[SITE_COL] == 'B']
+        assert b['sla_limit_minutes'].isna().all()
+        assert a['sla_limit_minutes'].notna().sum() == with_sla['sla_limit_minutes'].notna().sum()
+        assert isinstance(df['แผนก'].dtype, pd.CategoricalDtype), df['แผนก'].dtype
+
+
+def check_unmergeable_site_is_reported(path):
+    # ไซต์ที่รวมไม่ได้ (category คนละชนิด) -> แสดงไซต์ที่เหลือ และรายงานในสถานะ แทนที่ Dashboard จะล่ม
+    good = load_prepared(path)
+
+    def load_site(source):
+        if source.site == 'A':
+            return good
+        df, cube, meta = load_prepared(source.location)
+        df['แผนก'] = pd.Categorical(range(len(df)))
+        return df, cube, meta
+
+    loader = MultiSourceLoader([Source('A', path), Source('B', path)], load_site, ttl=300, timeout=30)
+    df, _, meta = loader.load()
+    assert list(df[SITE_COL].unique()) == ['A'], df[SITE_COL].unique()
+    assert 'รวมกับไซต์อื่นไม่ได้' in meta["sources"]['B'], meta["sources"]
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        path, no_sla_path = os.path.join(tmp, 'site.csv'), os.path.join(tmp, 'no_sla.csv')
+        make_csv(path, ROWS)
+        pd.read_csv(path).drop(columns='SLA').to_csv(no_sla_path, index=False)
+        checks = [
+            (check_shared_inflight_load, path),
+            (check_timed_out_load_is_harvested_later, path),
+            (check_concat_sites_with_different_columns, path, no_sla_path),
+            (check_unmergeable_site_is_reported, path),
+        ]
+        for check, *args in checks:
+            check(*args)
+            print(f"ok  {check.__name__}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+import os
+import sys
+import tempfile
+
+import pandas as pd
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_ingest import make_csv  # noqa: E402
+
+# ==========================================
+# ตรวจซ้ำตัวเลือก "เรียงตาม" ของตาราง Raw Data: Sheet ที่ไม่มีคอลัมน์ SLA ต้องไม่มีตัวเลือก SLA
+# (เคยเลือกได้แล้ว KeyError ใน fragment ของตาราง) รัน Dashboard ผ่าน AppTest กับไฟล์ CSV ในเครื่อง
+# ==========================================
+ROWS = 2_000
+
+
+def run_app(path):
+    # HELPDESK_SOURCES ชี้ไปที่ไฟล์ในเครื่อง -> ไม่ต้องดึง Google Sheet
+    os.environ["HELPDESK_SOURCES"] = f"site={path}"
+    st.cache_data.clear()
+    st.cache_resource.clear()
+    at = AppTest.from_file(os.path.join(ROOT, 'app.py'), default_timeout=120)
+    at.session_state["authenticated"] = True
+    at.run()
+    assert not at.exception, at.exception
+    return at
+
+
+def check_sort_options(path, expect_sla):
+    at = run_app(path)
+    options = at.selectbox(key="table_sort").options
+    assert ('SLA' in options) == expect_sla, options
+    # ทุกตัวเลือกที่แสดงต้องเรียงได้จริง ทั้งน้อยไปมากและมากไปน้อย
+    for option in options[1:]:
+        at.selectbox(key="table_sort").select(option).run()
+        assert not at.exception, (option, at.exception)
+        at.toggle(key="table_desc").set_value(True).run()
+        assert not at.exception, (option, 'desc', at.exception)
+        at.toggle(key="table_desc").set_value(False).run()
+    return options
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        path, no_sla_path = os.path.join(tmp, 'site.csv'), os.path.join(tmp, 'no_sla.csv')
+        make_csv(path, ROWS)
+        pd.read_csv(path).drop(columns='SLA').to_csv(no_sla_path, index=False)
+        for name, csv, expect_sla in [('with SLA', path, True), ('without SLA', no_sla_path, False)]:
+            options = check_sort_options(csv, expect_sla)
+            print(f"ok  {name}: {', '.join(options[1:])}")
+
+
+if __name__ == '__main__':
+    main()
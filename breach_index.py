@@ -0,0 +1,161 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from data_prep import CASE_COL, SITE_COL
+from sla_engine import closed_mask
+
+# ==========================================
+# ดัชนีเคสที่เปิดอยู่ เรียงตามเส้นตาย SLA (Received_DT + sla_limit_minutes) แยกกลุ่มตาม GROUP_COLS
+# ข้อมูลชุดเดิม -> ไม่ทำอะไร, ชุดใหม่ -> หาแถวที่เปลี่ยนด้วย hash แล้วแทรก/ลบเฉพาะแถวนั้น
+# ==========================================
+# ข้อมูลจาก Sheet เดียวไม่มีคอลัมน์ site -> ใช้ค่าว่างเป็นไซต์เดียว
+GROUP_COLS = [SITE_COL, 'แผนก', 'สถานะ']
+REBUILD_RATIO = 0.25
+NS_PER_MINUTE = 60_000_000_000
+
+
+def open_ticket_deadlines(df):
+    # คืนค่า DataFrame (hash, case, <GROUP_COLS>, deadline_ns) ของเคสที่เปิดอยู่และมีเวลารับเรื่อง (คำนวณทั้งคอลัมน์)
+    if 'sla_limit_minutes' not in df.columns or 'Received_DT' not in df.columns:
+        return pd.DataFrame({
+            'hash': pd.Series(dtype='uint64'), 'case': pd.Series(dtype=object),
+            **{col: pd.Series(dtype=object) for col in GROUP_COLS}, 'deadline_ns': pd.Series(dtype='int64'),
+        })
+    has_deadline = df['Received_DT'].notna().to_numpy() & df['sla_limit_minutes'].notna().to_numpy()
+    pos = np.flatnonzero(~closed_mask(df['สถานะ']) & has_deadline)
+    case = df[CASE_COL].to_numpy(dtype=object)[pos] if CASE_COL in df.columns else df.index.astype(str).to_numpy(dtype=object)[pos]
+    if SITE_COL in df.columns:
+        # รวมหลายไซต์ หมายเลข Case ชนกันได้ -> ใส่ชื่อไซต์นำหน้า
+        case = (df[SITE_COL].iloc[pos].astype(str).to_numpy(dtype=object) + ' / ') + case
+    case_hash = pd.util.hash_array(case, categorize=False)
+    # หมายเลข Case ซ้ำได้ -> ลำดับการเกิดซ้ำเป็นส่วนหนึ่งของตัวตนของแถว
+    occurrence = pd.Series(case_hash).groupby(case_hash).cumcount().to_numpy()
+    received = df['Received_DT'].to_numpy(dtype='datetime64[ns]').view('int64')[pos]
+    out = pd.DataFrame({
+        'case': case,
+        **{col: _group_values(df, col, pos) for col in GROUP_COLS},
+        'deadline_ns': received + df['sla_limit_minutes'].to_numpy()[pos].astype('int64') * NS_PER_MINUTE,
+    })
+    # hash ครอบตัวตนของเคสและค่า -> แถวที่แก้ไขจะเป็น "ลบของเดิม + เพิ่มของใหม่"
+    identity = pd.DataFrame({'case': case_hash, 'occurrence': occurrence, **{col: out[col] for col in [*GROUP_COLS, 'deadline_ns']}})
+    out.insert(0, 'hash', pd.util.hash_pandas_object(identity, index=False).to_numpy())
+    return out
+
+
+def _group_values(df, col, pos):
+    if col not in df.columns:
+        return pd.Categorical.from_codes(np.zeros(len(pos), dtype='int8'), categories=[''])
+    return df[col].iloc[pos].reset_index(drop=True)
+
+def _sorted_groups(entries):
+    groups = {}
+    entries = entries.sort_values('deadline_ns', kind='stable')
+    for group, part in entries.groupby(GROUP_COLS, sort=False, observed=True):
+        groups[group] = _arrays(part)
+    return groups
+
+def _arrays(part):
+    return part['deadline_ns'].to_numpy(), part['hash'].to_numpy(), part['case'].to_numpy()
+
+
+class BreachIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._entries = open_ticket_deadlines(pd.DataFrame())
+        self._groups = {}       # (ค่าของ GROUP_COLS) -> (deadline_ns, hash, case) เรียงตามเส้นตาย
+
+    def __len__(self):
+        return len(self._entries)
+
+    def sync(self, df, version=None):
+        # version: ตัวระบุชุดข้อมูล (เช่น computed_at) -- เส้นตายไม่ขึ้นกับเวลาปัจจุบัน ชุดเดิมจึงข้ามได้เลย
+        with self._lock:
+            if version is not None and version == self._version:
+                return 0, 0
+        current = open_ticket_deadlines(df)
+        with self._lock:
+            old = self._entries
+            added = current[~current['hash'].isin(old['hash'])]
+            removed = old[~old['hash'].isin(current['hash'])]
+            if len(added) + len(removed) > REBUILD_RATIO * max(len(old), 1):
+                self._groups = _sorted_groups(current)
+            else:
+                self._apply(removed, added)
+            self._entries, self._version = current, version
+            return len(added), len(removed)
+
+    def _apply(self, removed, added):
+        for group, part in removed.groupby(GROUP_COLS, sort=False, observed=True):
+            deadlines, hashes, cases = self._groups[group]
+            keep = ~pd.Index(hashes).isin(part['hash'])
+            if keep.any(): self._groups[group] = (deadlines[keep], hashes[keep], cases[keep])
+            else: del self._groups[group]
+        for group, part in added.sort_values('deadline_ns', kind='stable').groupby(GROUP_COLS, sort=False, observed=True):
+            new = _arrays(part)
+            if group not in self._groups:
+                self._groups[group] = new
+                continue
+            pos = np.searchsorted(self._groups[group][0], new[0], side='right')
+            self._groups[group] = tuple(np.insert(old, pos, values) for old, values in zip(self._groups[group], new))
+
+    def _selected(self, filters):
+        # filters: {คอลัมน์ใน GROUP_COLS: ค่าที่เลือก} ค่าว่าง = ทุกค่า (กรองระดับกลุ่ม ไม่แตะทีละเคส)
+        wanted = [set(map(str, (filters or {}).get(col) or ())) for col in GROUP_COLS]
+        return [
+            (group, arrays) for group, arrays in self._groups.items()
+            if all(not values or value in values for values, value in zip(wanted, group))
+        ]
+
+    def next_to_breach(self, now, n=10, filters=None):
+        # เคสที่ยังไม่เกินเส้นตาย เรียงตามเวลาที่เหลือ: searchsorted หาตำแหน่ง now ในแต่ละกลุ่ม แล้วตัดมากลุ่มละ n รายการ
+        now_ns = pd.Timestamp(now).value
+        dept_at = GROUP_COLS.index('แผนก')
+        deadlines, cases, depts = [], [], []
+        with self._lock:
+            for group, (group_deadlines, _, group_cases) in self._selected(filters):
+                start = np.searchsorted(group_deadlines, now_ns, side='left')
+                deadlines.append(group_deadlines[start:start + n])
+                cases.append(group_cases[start:start + n])
+                depts.append(np.full(len(deadlines[-1]), group[dept_at], dtype=object))
+        deadline_ns = np.concatenate(deadlines) if deadlines else np.array([], dtype='int64')
+        order = np.argsort(deadline_ns, kind='stable')[:n]
+        out = pd.DataFrame({
+            'case': np.concatenate(cases)[order] if cases else [],
+            'dept': np.concatenate(depts)[order] if depts else [],
+            'deadline': pd.to_datetime(deadline_ns[order], unit='ns'),
+        })
+        out['minutes_left'] = (deadline_ns[order] - now_ns) / 6e10
+        return out
+
+    def dept_countdowns(self, now, filters=None):
+        # ต่อแผนก: จำนวนเคสที่เกินแล้ว + เคสถัดไปที่จะเกิน (O(log n) ต่อกลุ่ม)
+        now_ns = pd.Timestamp(now).value
+        dept_at = GROUP_COLS.index('แผนก')
+        per_dept = {}
+        with self._lock:
+            for group, (deadlines, _, cases) in self._selected(filters):
+                i = int(np.searchsorted(deadlines, now_ns, side='left'))
+                row = per_dept.setdefault(group[dept_at], [0, 0, None, None])
+                row[0] += i
+                row[1] += len(deadlines) - i
+                if i < len(deadlines) and (row[3] is None or deadlines[i] < row[3]):
+                    row[2], row[3] = cases[i], deadlines[i]
+        rows = [
+            (dept, breached, pending, case, np.nan if deadline is None else (deadline - now_ns) / 6e10)
+            for dept, (breached, pending, case, deadline) in per_dept.items()
+        ]
+        out = pd.DataFrame(rows, columns=['dept', 'breached', 'pending', 'next_case', 'minutes_left'])
+        return out.sort_values('minutes_left', na_position='last', kind='stable').reset_index(drop=True)
+
+
+def format_countdown(minutes):
+    if pd.isna(minutes): return '-'
+    minutes = int(minutes)
+    days, rest = divmod(minutes, 1440)
+    hours, mins = divmod(rest, 60)
+    if days: return f"{days} วัน {hours} ชม."
+    if hours: return f"{hours} ชม. {mins} นาที"
+    return f"{mins} นาที"
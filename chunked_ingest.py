@@ -0,0 +1,85 @@
+import pandas as pd
+from dataclasses import dataclass
+from pandas.api.types import union_categoricals
+
+from data_prep import SOURCE_COLS, compact_schema, frame_memory_mb, open_source, prep_static, source_csv_options
+
+# ==========================================
+# โหลด CSV แบบทีละ chunk: เตรียมคอลัมน์ + ย่อ schema ทีละส่วน แล้วค่อยต่อกัน
+# ไม่ต้องถือข้อมูลดิบทั้งไฟล์พร้อมกัน -> ลดหน่วยความจำสูงสุด แต่ขนาด chunk ไม่ใช่เพดานของ process
+# (RSS สูงสุดที่วัดจริงอยู่ใน meta ของ load_prepared และ benchmarks/bench_ingest.py)
+# ==========================================
+PROBE_ROWS = 1_000
+MIN_CHUNK_ROWS = 1_000
+
+
+@dataclass
+class IngestReport:
+    # ขนาดทุกค่าประมาณจาก DataFrame.memory_usage (ไม่รวม buffer ของ parser) ไม่ใช่ค่าที่วัดจาก process
+    mode: str = 'one-shot'
+    rows: int = 0
+    chunks: int = 1
+    chunk_rows: int = 0
+    chunk_mb: float = 0.0           # chunk ที่ใหญ่ที่สุดหลังเตรียมคอลัมน์ (ก่อนย่อ schema)
+    prepared_mb: float = 0.0        # ผลรวมก่อนย่อ schema
+    retained_mb: float = 0.0        # ผลลัพธ์ที่เก็บไว้หลังย่อ schema
+    target_chunk_mb: float = None   # ขนาด chunk ที่ตั้งไว้
+
+    def __str__(self):
+        if self.mode != 'chunked':
+            return f"นำเข้าทีเดียว {self.rows:,} แถว | ประมาณ {self.prepared_mb:,.1f} MB ก่อนย่อ, คงไว้ {self.retained_mb:,.1f} MB"
+        return (f"นำเข้า {self.chunks:,} chunk × {self.chunk_rows:,} แถว "
+                f"(ประมาณ {self.chunk_mb:,.1f} MB/chunk, ตั้งไว้ {self.target_chunk_mb:g} MB) | คงไว้ {self.retained_mb:,.1f} MB")
+
+
+def read_prepared_chunks(source, chunk_mb, chunk_rows=None, timeout=None):
+    # คืนค่า (df หลัง prep_static + compact_schema, IngestReport) เหมือน compact_schema(prep_static(read_source(...)))
+    # chunk_mb: ขนาดโดยประมาณของแต่ละ chunk หลังเตรียมคอลัมน์ (ใช้กำหนดจำนวนแถวต่อ chunk)
+    parts, largest_mb, prepared_mb = [], 0.0, 0.0
+    with open_source(source, timeout) as f, pd.read_csv(f, iterator=True, **source_csv_options()) as reader:
+        size = chunk_rows or PROBE_ROWS
+        while True:
+            try:
+                chunk = reader.get_chunk(size)
+            except StopIteration:
+                break
+            if chunk.empty:
+                break
+            chunk.columns = chunk.columns.str.strip()
+            chunk = prep_static(chunk)
+            working_mb = frame_memory_mb(chunk)
+            prepared_mb += working_mb
+            largest_mb = max(largest_mb, working_mb)
+            if chunk_rows is None:
+                # chunk แรกใช้วัดขนาดต่อแถว แล้วปรับจำนวนแถวของ chunk ถัดไปให้ได้ขนาดตามที่ตั้งไว้
+                chunk_rows = max(MIN_CHUNK_ROWS, int(chunk_mb / max(working_mb / len(chunk), 1e-9)))
+                size = chunk_rows
+            # เก็บแยกทีละคอลัมน์ (copy ออกจาก block ของ chunk) เพื่อให้ตอนต่อคืนหน่วยความจำได้ทีละคอลัมน์
+            part = {col: values.copy() for col, values in compact_schema(chunk).items()}
+            parts.append(part)
+    chunks = len(parts)
+    df = concat_columns(parts)
+    report = IngestReport(
+        mode='chunked', rows=len(df), chunks=chunks, chunk_rows=chunk_rows or 0, chunk_mb=largest_mb,
+        prepared_mb=prepared_mb, retained_mb=frame_memory_mb(df), target_chunk_mb=chunk_mb,
+    )
+    return df, report
+
+
+def concat_columns(parts):
+    # parts: list ของ {คอลัมน์: Series} -> ต่อทีละคอลัมน์ แล้วทิ้งชิ้นเดิมทันที
+    if not parts:
+        return compact_schema(prep_static(pd.DataFrame(columns=SOURCE_COLS, dtype='str')))
+    columns = {}
+    for col in list(parts[0]):
+        pieces = [part.pop(col) for part in parts]
+        if isinstance(pieces[0].dtype, pd.CategoricalDtype) and any(p.dtype != pieces[0].dtype for p in pieces):
+            # category ของแต่ละ chunk ต่างกัน -> รวมรายการ category ก่อน ไม่ให้ pd.concat ตกเป็น object
+            # (คอลัมน์ที่ dtype ตายตัวอยู่แล้ว เช่น sla_status_label ต่อกันได้ตรง ๆ)
+            values = pd.Series(union_categoricals(pieces, sort_categories=True), name=col)
+        else:
+            values = pd.concat(pieces, ignore_index=True)
+        del pieces
+        columns[col] = values
+    parts.clear()
+    return pd.DataFrame(columns)
@@ -0,0 +1,90 @@
+import sys
+import urllib.request
+from contextlib import contextmanager
+
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows ไม่มีโมดูล resource
+    resource = None
+
+from sla_engine import SLA_LABEL_DTYPE, apply_static_sla_columns
+
+# ==========================================
+# ชื่อคอลัมน์จาก Google Sheet
+# ==========================================
+CASE_COL = 'หมายเลข Case'
+RECEIVED_COL = 'วัน / เวลา (รับเรื่องร้องขอ)'
+CLOSED_COL = 'วัน / เวลา (ปิดเคส)'
+DATETIME_FORMAT = '%d/%m/%y %H:%M:%S'
+DIMENSION_COLS = ['แผนก', 'สถานะ', 'Category', 'Sub Category']
+# มิติที่ loader เติมเองเมื่อรวมหลาย Sheet (หนึ่ง Sheet ต่อหนึ่งไซต์)
+SITE_COL = 'site'
+UNKNOWN = 'ไม่ระบุ'
+# คอลัมน์จาก Sheet ที่ Dashboard ใช้จริง คอลัมน์อื่นไม่ถูกโหลดเข้าหน่วยความจำเลย
+SOURCE_COLS = [CASE_COL, RECEIVED_COL, CLOSED_COL, *DIMENSION_COLS, 'SLA']
+
+
+def source_csv_options():
+    # อ่านทุกคอลัมน์เป็นข้อความ -> dtype ไม่เปลี่ยนตามข้อมูลในแต่ละ chunk (ผลเหมือนโหลดทีเดียว)
+    return {'usecols': lambda col: col.strip() in SOURCE_COLS, 'dtype': 'str'}
+
+@contextmanager
+def open_source(source, timeout=None):
+    # source เป็นได้ทั้ง URL (http/https) และ path ไฟล์ CSV ในเครื่อง
+    # timeout (วินาที) ใช้กับ URL: เปิดการเชื่อมต่อเองเพื่อกำหนด timeout ของ socket ได้
+    if timeout is None or not str(source).startswith(('http://', 'https://')):
+        yield source
+        return
+    with urllib.request.urlopen(source, timeout=timeout) as response:
+        yield response
+
+def read_source(source, timeout=None):
+    with open_source(source, timeout) as f:
+        df = pd.read_csv(f, **source_csv_options())
+    df.columns = df.columns.str.strip()
+    return df
+
+def add_date_columns(df):
+    if RECEIVED_COL in df.columns:
+        df['Received_DT'] = pd.to_datetime(df[RECEIVED_COL], format=DATETIME_FORMAT, errors='coerce')
+        df['Received_Date'] = df['Received_DT'].dt.normalize()
+    if CLOSED_COL in df.columns:
+        df['Closed_DT'] = pd.to_datetime(df[CLOSED_COL], format=DATETIME_FORMAT, errors='coerce')
+    return df
+
+def fill_dimensions(df):
+    for col in DIMENSION_COLS:
+        df[col] = df.get(col, pd.Series([UNKNOWN]*len(df), index=df.index)).fillna(UNKNOWN)
+    return df
+
+def prep_static(df):
+    # ทุกอย่างที่ไม่ขึ้นกับเวลาปัจจุบัน -> ผลลัพธ์นี้เก็บใน cache ได้
+    df = add_date_columns(df)
+    df = fill_dimensions(df)
+    return apply_static_sla_columns(df)
+
+def compact_schema(df):
+    # มิติเป็น category, ตัวเลข SLA ย่อขนาด -> ประหยัดหน่วยความจำและกรองเร็วขึ้น
+    for col in DIMENSION_COLS:
+        df[col] = df[col].astype('category')
+    df['sla_status_label'] = df['sla_status_label'].astype(SLA_LABEL_DTYPE)
+    if 'SLA' in df.columns:
+        df['SLA'] = df['SLA'].astype('category')
+    if 'sla_limit_minutes' in df.columns:
+        df['sla_limit_minutes'] = pd.to_numeric(df['sla_limit_minutes'], downcast='integer')
+    if 'actual_minutes_spent' in df.columns:
+        df['actual_minutes_spent'] = df['actual_minutes_spent'].astype('float32')
+    return df
+
+def frame_memory_mb(df):
+    return df.memory_usage(deep=True).sum() / 1024**2
+
+def peak_rss_mb():
+    # RSS สูงสุดของ process ตั้งแต่เริ่ม (วัดจากระบบปฏิบัติการ ค่าไม่ลดลง) -- None ถ้าวัดไม่ได้
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux รายงานเป็น KB, macOS เป็น byte
+    return peak / (1024**2 if sys.platform == 'darwin' else 1024)
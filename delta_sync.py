@@ -0,0 +1,107 @@
+import argparse
+import os
+import uuid
+from dataclasses import dataclass
+
+import pandas as pd
+
+from data_prep import CASE_COL, prep_static, read_source
+
+HASH_COL = '_row_hash'
+KEY_COLS = ['_case_key', '_occurrence']
+
+
+@dataclass
+class SyncReport:
+    added: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    removed: int = 0
+
+    def __str__(self):
+        return f"เพิ่ม {self.added:,} | แก้ไข {self.updated:,} | ไม่เปลี่ยน {self.unchanged:,} | ลบ {self.removed:,}"
+
+
+# ==========================================
+# Snapshot ในเครื่อง (Parquet) คีย์ด้วยหมายเลข Case
+# ==========================================
+class SnapshotStore:
+    def __init__(self, path):
+        self.path = path
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return None
+        return pd.read_parquet(self.path)
+
+    def save(self, df):
+        # ชื่อไฟล์ชั่วคราวไม่ซ้ำกัน (โฟลเดอร์เดียวกัน) -> หลาย process เขียน snapshot เดียวกันได้โดยไม่เขียนทับไฟล์ของกันและกัน
+        tmp_path = f"{self.path}.{uuid.uuid4().hex}.tmp"
+        try:
+            df.to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path): os.remove(tmp_path)
+            raise
+
+    def sync(self, source, timeout=None):
+        # คืนค่าเฉพาะส่วนที่ไม่ขึ้นกับเวลา ผู้เรียกต้อง age_open_tickets เอง
+        raw = read_source(source, timeout)
+        keys = _row_keys(raw)
+        raw[HASH_COL] = pd.util.hash_pandas_object(raw, index=False).to_numpy()
+
+        snap = self.load()
+        if snap is None or keys is None or not set(KEY_COLS) <= set(snap.columns):
+            merged = prep_static(raw)
+            self.save(_with_keys(merged, keys))
+            return merged.drop(columns=[HASH_COL]), SyncReport(added=len(raw))
+
+        snap = snap.set_index(KEY_COLS)
+        old_hash = snap[HASH_COL].reindex(keys).to_numpy()
+        is_new = pd.isna(old_hash)
+        is_changed = ~is_new & (old_hash != raw[HASH_COL].to_numpy())
+        is_unchanged = ~is_new & ~is_changed
+
+        # คำนวณใหม่เฉพาะแถวที่เพิ่ม/แก้ไข ส่วนที่เหลือดึงจาก snapshot
+        fresh = prep_static(raw[is_new | is_changed].copy())
+        kept = snap.loc[keys[is_unchanged]].reset_index(drop=True)
+        kept.index = raw.index[is_unchanged]
+
+        parts = [part for part in (fresh, kept) if not part.empty]
+        merged = pd.concat(parts).sort_index()[fresh.columns] if parts else fresh
+        self.save(_with_keys(merged, keys))
+
+        report = SyncReport(
+            added=int(is_new.sum()), updated=int(is_changed.sum()), unchanged=int(is_unchanged.sum()),
+            removed=int(len(snap) - is_unchanged.sum() - is_changed.sum()),
+        )
+        return merged.drop(columns=[HASH_COL]), report
+
+
+def _row_keys(raw):
+    # หมายเลข Case ซ้ำได้ใน Sheet -> ใช้ลำดับการเกิดซ้ำเป็นคีย์รอง
+    if CASE_COL not in raw.columns:
+        return None
+    case = raw[CASE_COL].astype(str)
+    return pd.MultiIndex.from_arrays([case, case.groupby(case).cumcount()], names=KEY_COLS)
+
+def _with_keys(df, keys):
+    if keys is None:
+        return df
+    out = df.copy()
+    for i, col in enumerate(KEY_COLS):
+        out[col] = keys.get_level_values(i)
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ซิงก์ข้อมูล Helpdesk แบบเฉพาะส่วนที่เปลี่ยน ลง snapshot ในเครื่อง")
+    parser.add_argument('source', help="URL หรือ path ไฟล์ CSV")
+    parser.add_argument('snapshot', help="path ไฟล์ Parquet สำหรับเก็บ snapshot")
+    args = parser.parse_args()
+    _, report = SnapshotStore(args.snapshot).sync(args.source)
+    print(report)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+import os
+
+import plotly.express as px
+import plotly.graph_objects as go
+import streamlit as st
+
+# ==========================================
+# กราฟทั้งหมดของ Dashboard (cache ตามข้อมูลที่สรุปแล้ว)
+# ==========================================
+# กราฟ Trend เกินจำนวนจุดนี้ -> รวมเป็นรายสัปดาห์/รายเดือน และใช้ WebGL แบบไม่มีตัวเลขทุกจุด
+TREND_MAX_POINTS = int(os.environ.get("HELPDESK_TREND_MAX_POINTS", 90))
+TREND_BUCKETS = [('W-MON', 'สัปดาห์', 'Weekly'), ('MS', 'เดือน', 'Monthly')]
+
+PRO_LAYOUT = dict(
+    paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)",
+    font=dict(family="Prompt", color="#0F172A", size=14),
+    xaxis=dict(color="#0F172A", showgrid=False, tickfont=dict(size=13, weight="bold"), automargin=True),
+    yaxis=dict(color="#0F172A", showgrid=True, gridcolor="#E2E8F0", gridwidth=1, tickfont=dict(size=13, weight="bold"), automargin=True),
+    margin=dict(t=40, b=40, l=40, r=40)
+)
+
+STATUS_COLOR_MAP = {
+    'ปิด Case': '#10B981', 'เสร็จสิ้น': '#10B981',
+    'รับเรื่องร้องขอ': '#F59E0B', 'กำลังดำเนินการ': '#3B82F6', 'ไม่ระบุ': '#94A3B8'
+}
+SLA_COLOR_MAP = {
+    '✅ ภายใน SLA': '#10B981', '🟢 ปกติ': '#34D399',
+    '⚠️ ใกล้หลุด SLA (เร่งมือ)': '#F59E0B',
+    '🔥 เกินกำหนด (รีบปิดด่วน!)': '#EF4444', '❌ เกิน SLA (ปิดแล้ว)': '#B91C1C'
+}
+
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def dept_figure(dept_df):
+    chart_height = max(500, len(dept_df) * 45)
+    fig_dept = px.bar(dept_df, x='Count', y='Department', orientation='h', text='Count')
+    fig_dept.update_traces(
+        marker_color='#3B82F6', marker_line_color='#2563EB', marker_line_width=1,
+        texttemplate='<b>%{x}</b>', textposition='outside', textfont=dict(color='#0F172A', size=15),
+        cliponaxis=False
+    )
+    fig_dept.update_layout(**PRO_LAYOUT)
+    fig_dept.update_layout(height=chart_height, showlegend=False, xaxis_title="", yaxis_title="")
+    fig_dept.update_yaxes(categoryorder='total ascending')
+    fig_dept.update_xaxes(range=[0, dept_df['Count'].max() * 1.15] if not dept_df.empty else [0, 100])
+    return fig_dept
+
+def bucket_trend(trend_df, max_points=TREND_MAX_POINTS):
+    # คืนค่า (ข้อมูล, ชื่อช่วงเวลาไทย, ชื่ออังกฤษ) เลือกช่วงที่ละเอียดที่สุดที่ไม่เกิน max_points
+    if len(trend_df) <= max_points:
+        return trend_df, 'วัน', 'Daily'
+    cases = trend_df.set_index('Received_Date')['Cases']
+    for freq, label_th, label_en in TREND_BUCKETS:
+        bucketed = cases.resample(freq, label='left', closed='left').sum().reset_index()
+        if len(bucketed) <= max_points:
+            break
+    return bucketed, label_th, label_en
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def trend_figure(trend_df, bucketed):
+    fig_trend = go.Figure()
+    if not bucketed:
+        fig_trend.add_trace(go.Scatter(
+            x=trend_df['Received_Date'], y=trend_df['Cases'], mode='lines+markers+text',
+            text=trend_df['Cases'], textposition='top center', textfont=dict(color='#0F172A', size=15, weight="bold"),
+            line=dict(color='#2563EB', width=3, shape='spline'),
+            marker=dict(size=8, color='#FFFFFF', line=dict(width=2, color='#2563EB')),
+            fill='tozeroy', fillcolor='rgba(59, 130, 246, 0.1)',
+            cliponaxis=False
+        ))
+    else:
+        # จุดเยอะ -> WebGL ไม่มีตัวเลขกำกับทุกจุด (ดูค่าได้จาก hover)
+        fig_trend.add_trace(go.Scattergl(
+            x=trend_df['Received_Date'], y=trend_df['Cases'], mode='lines',
+            line=dict(color='#2563EB', width=2),
+            fill='tozeroy', fillcolor='rgba(59, 130, 246, 0.1)',
+        ))
+    fig_trend.update_layout(**PRO_LAYOUT)
+    fig_trend.update_layout(height=450, xaxis_title="", yaxis_title="")
+    fig_trend.update_yaxes(range=[0, trend_df['Cases'].max() * 1.3])
+    return fig_trend
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def donut_figure(counts_df, names, color_map):
+    fig = px.pie(counts_df, names=names, values='Count', hole=0.55, color=names, color_discrete_map=color_map)
+    fig.update_traces(
+        textposition='outside', textinfo='percent+label',
+        textfont=dict(size=14, color='#0F172A', weight="bold"),
+        marker=dict(line=dict(color='#FFFFFF', width=2))
+    )
+    fig.update_layout(**PRO_LAYOUT)
+    # 💥 เพิ่มความสูงเป็น 600px และถ่างขอบบน-ล่างให้กว้างถึง 150px!
+    fig.update_layout(height=600, showlegend=False, margin=dict(t=150, b=150, l=150, r=150))
+    return fig
@@ -0,0 +1,49 @@
+import logging
+import time
+
+from chunked_ingest import IngestReport, read_prepared_chunks
+from data_prep import compact_schema, frame_memory_mb, peak_rss_mb, prep_static, read_source
+from delta_sync import SnapshotStore
+from rollup import build_closed_cube
+
+log = logging.getLogger(__name__)
+
+
+# ==========================================
+# โหลด + เตรียมข้อมูล (ใช้ร่วมกันระหว่าง Dashboard และ precompute worker)
+# ==========================================
+def load_prepared(url, snapshot_path=None, chunk_mb=None, timeout=None):
+    # chunk_mb: ขนาดโดยประมาณ (MB) ต่อ chunk -> โหลดแบบทีละ chunk, None = โหลดทีเดียว
+    # timeout: วินาทีสำหรับการเชื่อมต่อ URL (None = ไม่จำกัด)
+    # ตั้งทั้ง snapshot_path และ chunk_mb -> ใช้ delta sync ซึ่งอ่านทั้งไฟล์ทีเดียว (chunk_mb ไม่มีผล)
+    started = time.perf_counter()
+    timings = {}
+    peak_before = peak_rss_mb()
+    if snapshot_path:
+        if chunk_mb:
+            log.warning("snapshot sync reads %s in one pass; chunk_mb=%g is ignored and does not bound memory", url, chunk_mb)
+        df, report = SnapshotStore(snapshot_path).sync(url, timeout)
+        timings["snapshot_sync"] = (time.perf_counter() - started) * 1000
+        memory_before = frame_memory_mb(df)
+        df, ingest = compact_schema(df), None
+    elif chunk_mb:
+        df, ingest = read_prepared_chunks(url, chunk_mb, timeout=timeout)
+        timings["chunked_ingest"] = (time.perf_counter() - started) * 1000
+        report, memory_before = None, ingest.prepared_mb
+    else:
+        raw = read_source(url, timeout)
+        timings["fetch"] = (time.perf_counter() - started) * 1000
+        df, report = prep_static(raw), None
+        timings["parse"] = (time.perf_counter() - started) * 1000 - timings["fetch"]
+        memory_before = frame_memory_mb(df)
+        df = compact_schema(df)
+        ingest = IngestReport(
+            rows=len(df), chunk_rows=len(df), chunk_mb=memory_before, prepared_mb=memory_before, retained_mb=frame_memory_mb(df),
+        )
+    meta = {
+        "sync_report": report, "ingest_report": ingest, "memory_before": memory_before, "memory_after": frame_memory_mb(df),
+        # ค่าที่วัดจริง: RSS สูงสุดของ process ก่อน/หลังนำเข้า (หลัง > ก่อน = การนำเข้ารอบนี้ดันค่าสูงสุดขึ้น)
+        "peak_rss_before": peak_before, "peak_rss_after": peak_rss_mb(),
+        "computed_at": time.time(), "timings": timings,
+    }
+    return df, build_closed_cube(df), meta
@@ -0,0 +1,196 @@
+import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from chunked_ingest import concat_columns
+from data_prep import SITE_COL, frame_memory_mb, peak_rss_mb
+from rollup import build_closed_cube
+
+log = logging.getLogger(__name__)
+
+# ==========================================
+# โหลดหลาย Sheet (หนึ่ง Sheet ต่อไซต์) พร้อมกันบน thread pool แล้วรวมเป็นชุดเดียวพร้อมมิติ site
+# เวลารวม ~ แหล่งที่ช้าที่สุด ไม่ใช่ผลรวมของทุกแหล่ง
+# ==========================================
+MAX_WORKERS = 16
+# "ชื่อไซต์=แหล่งข้อมูล" -> ชื่อไซต์ต้องไม่มี / หรือ : (กันสับสนกับ ?output=csv ใน URL)
+_NAMED_SOURCE = re.compile(r'^\s*([^=/:]+?)\s*=\s*(.+?)\s*$')
+
+
+@dataclass(frozen=True)
+class Source:
+    site: str
+    location: str
+
+
+def parse_sources(spec):
+    # แยกด้วยขึ้นบรรทัดใหม่หรือ ; เช่น "BKK=https://...;CNX=/data/cnx.csv"
+    sources = []
+    for i, entry in enumerate(e.strip() for e in re.split(r'[;\n]', spec or '')):
+        if not entry: continue
+        named = _NAMED_SOURCE.match(entry)
+        if named:
+            sources.append(Source(*named.groups()))
+        else:
+            # ไม่ตั้งชื่อ -> ใช้ชื่อไฟล์ (path ในเครื่อง) หรือลำดับ (URL)
+            is_url = entry.startswith(('http://', 'https://'))
+            sources.append(Source(f"site{i + 1}" if is_url else os.path.splitext(os.path.basename(entry))[0], entry))
+    sites = [s.site for s in sources]
+    duplicated = sorted({s for s in sites if sites.count(s) > 1})
+    if duplicated:
+        raise ValueError(f"ชื่อไซต์ซ้ำกัน: {', '.join(duplicated)}")
+    return sources
+
+def site_snapshot_path(snapshot_path, site):
+    # snapshot ของ delta sync แยกไฟล์ต่อไซต์: helpdesk.parquet -> helpdesk.<site>.parquet
+    if not snapshot_path:
+        return None
+    root, ext = os.path.splitext(snapshot_path)
+    return f"{root}.{site}{ext}"
+
+
+class MultiSourceLoader:
+    def __init__(self, sources, load_fn, ttl=300, timeout=60, max_workers=None):
+        # load_fn(source) -> (df, closed_cube, meta) แบบเดียวกับ load_prepared
+        self.sources = list(sources)
+        self._load_fn = load_fn
+        self.ttl = ttl
+        self.timeout = timeout
+        self._pool = ThreadPoolExecutor(max_workers or min(len(self.sources), MAX_WORKERS), thread_name_prefix="helpdesk-source")
+        self._lock = threading.Lock()
+        self._cache = {}        # site -> (loaded_at, (df, closed_cube, meta), seconds)
+        self._running = {}      # site -> Future ที่ยังโหลดไม่เสร็จ (รวมถึงที่เกิน timeout รอบก่อน)
+        self._errors = {}       # site -> ข้อความ error ล่าสุด
+        self._merge_errors = {} # site -> เหตุที่รวมกับไซต์อื่นไม่ได้ (จากการรวมครั้งล่าสุด)
+        self._merged = None
+
+    def load(self):
+        started = time.perf_counter()
+        with self._lock:
+            futures = {s.site: self._submit(s) for s in self.sources if self._is_stale(s.site)}
+        # ทุกแหล่งเริ่มพร้อมกัน -> รอรวดเดียวด้วย timeout เท่ากับรอแต่ละแหล่งไม่เกิน timeout
+        wait(futures.values(), timeout=self.timeout)
+        with self._lock:
+            changed = False
+            for site, future in futures.items():
+                if self._running.get(site) is not future:
+                    # หลาย session รอ future เดียวกัน -> session ที่ได้ lock ก่อนเก็บผลไปแล้ว
+                    continue
+                if not future.done():
+                    # ปล่อยให้โหลดต่อเบื้องหลัง รอบหน้าค่อยเก็บผล ไม่ยิงซ้ำ
+                    self._errors[site] = f"เกิน {self.timeout:g} s"
+                    continue
+                del self._running[site]
+                try:
+                    result, seconds = future.result()
+                except Exception as e:
+                    log.exception("loading site %s failed; keeping its previous data", site)
+                    self._errors[site] = str(e) or type(e).__name__
+                    continue
+                self._cache[site] = (time.time(), result, seconds)
+                self._errors.pop(site, None)
+                changed = True
+            if not self._cache:
+                raise RuntimeError(f"โหลดข้อมูลไม่สำเร็จทุกไซต์: {self._errors}")
+            if changed or self._merged is None:
+                self._merged = self._merge()
+            df, closed_cube, meta = self._merged
+            meta = {
+                **meta, "sources": self._statuses(),
+                "timings": {**meta["timings"], "sources_wall": (time.perf_counter() - started) * 1000},
+            }
+            return df, closed_cube, meta
+
+    def _is_stale(self, site):
+        cached = self._cache.get(site)
+        return cached is None or time.time() - cached[0] >= self.ttl
+
+    def _submit(self, source):
+        # ถ้ายังมีรอบก่อนค้างอยู่ (เกิน timeout) ใช้ future เดิม ไม่เปิดการเชื่อมต่อซ้อน
+        if source.site not in self._running:
+            self._running[source.site] = self._pool.submit(self._timed_load, source)
+        return self._running[source.site]
+
+    def _timed_load(self, source):
+        started = time.perf_counter()
+        result = self._load_fn(source)
+        return result, time.perf_counter() - started
+
+    def _merge(self):
+        sites = [s.site for s in self.sources if s.site in self._cache]
+        frames = {site: self._cache[site][1][0] for site in sites}
+        started = time.perf_counter()
+        self._merge_errors = {}
+        try:
+            df = concat_sites({site: frames[site] for site in sites})
+        except Exception:
+            # รวมรวดเดียวไม่ได้ -> เพิ่มทีละไซต์ ไซต์ที่รวมไม่ได้แสดงในสถานะ ไม่ทำให้ทั้ง Dashboard ล่ม
+            log.exception("merging sites failed; retrying one site at a time")
+            merged = []
+            for site in sites:
+                try:
+                    concat_sites({s: frames[s] for s in [*merged, site]})
+                    merged.append(site)
+                except Exception as e:
+                    self._merge_errors[site] = f"รวมกับไซต์อื่นไม่ได้: {e}"
+            if not merged:
+                raise
+            sites = merged
+            df = concat_sites({site: frames[site] for site in sites})
+        closed_cube = build_closed_cube(df)
+        metas = [self._cache[site][1][2] for site in sites]
+        meta = {
+            "sync_report": None, "ingest_report": None,
+            "memory_before": sum(m["memory_before"] for m in metas), "memory_after": frame_memory_mb(df),
+            # ทุกไซต์โหลดใน process เดียวกัน -> ก่อน = ค่าที่ต่ำสุดก่อนเริ่มโหลด, หลัง = วัดใหม่หลังรวม
+            "peak_rss_before": min((m.get("peak_rss_before") for m in metas if m.get("peak_rss_before") is not None), default=None),
+            "peak_rss_after": peak_rss_mb(),
+            "computed_at": max(m["computed_at"] for m in metas),
+            "timings": {f"{site}:{name}": ms for site, m in zip(sites, metas) for name, ms in m["timings"].items()},
+        }
+        meta["timings"]["merge"] = (time.perf_counter() - started) * 1000
+        return df, closed_cube, meta
+
+    def _statuses(self):
+        statuses = {}
+        for source in self.sources:
+            cached = self._cache.get(source.site)
+            parts = []
+            if cached:
+                loaded_at, (df, _, meta), seconds = cached
+                report = meta["sync_report"] or meta["ingest_report"]
+                parts.append(f"{len(df):,} แถว · {seconds:,.1f} s" + (f" · {report}" if report else ""))
+            if source.site in self._errors:
+                stale = " (แสดงข้อมูลชุดก่อนหน้า)" if cached else ""
+                parts.append(f"⚠️ {self._errors[source.site]}{stale}")
+            if source.site in self._merge_errors:
+                parts.append(f"⚠️ {self._merge_errors[source.site]} (ไม่แสดงไซต์นี้)")
+            statuses[source.site] = " · ".join(parts)
+        return statuses
+
+
+def concat_sites(frames):
+    # frames: {site: df} -> ต่อเป็นชุดเดียวพร้อมคอลัมน์ site (category ตามลำดับไซต์)
+    # แต่ละ Sheet อาจมีคอลัมน์ไม่ครบ -> เติมคอลัมน์ที่ขาดด้วยค่าว่าง dtype ตามไซต์ที่มีคอลัมน์นั้น
+    columns = list(dict.fromkeys(col for df in frames.values() for col in df.columns))
+    dtypes = {col: next(df[col].dtype for df in frames.values() if col in df.columns) for col in columns}
+    site_dtype = pd.CategoricalDtype(list(frames))
+    parts = []
+    for code, df in enumerate(frames.values()):
+        part = {col: df[col] if col in df.columns else _missing_column(dtypes[col], len(df)) for col in columns}
+        part[SITE_COL] = pd.Series(pd.Categorical.from_codes(np.full(len(df), code, dtype='int8'), dtype=site_dtype), name=SITE_COL)
+        parts.append(part)
+    return concat_columns(parts)
+
+def _missing_column(dtype, n):
+    # จำนวนเต็มเก็บค่าว่างไม่ได้ -> ใช้ float (เช่น sla_limit_minutes ของไซต์ที่ไม่มีคอลัมน์ SLA)
+    if pd.api.types.is_integer_dtype(dtype):
+        dtype = 'float64'
+    return pd.Series(np.nan, index=pd.RangeIndex(n), dtype=dtype)
@@ -0,0 +1,60 @@
+import argparse
+import logging
+import time
+
+from loader import load_prepared
+from multi_source import MultiSourceLoader, parse_sources, site_snapshot_path
+from shared_snapshot import SharedSnapshotDir
+
+# ==========================================
+# Worker แบบ headless: โหลด+เตรียมข้อมูลตามรอบเวลา แล้วเผยแพร่ snapshot ให้ทุก replica
+# ==========================================
+log = logging.getLogger("precompute_worker")
+
+
+def run_once(load_fn, shared_dir, keep=3):
+    started = time.perf_counter()
+    df, closed_cube, meta = load_fn()
+    version = SharedSnapshotDir(shared_dir).publish(df, closed_cube, meta, keep=keep)
+    log.info("published %s: %d rows in %.1fs (%s)", version, len(df), time.perf_counter() - started, meta["sync_report"] or meta.get("sources") or "full load")
+    return version
+
+def make_load_fn(source_specs, snapshot_path=None, chunk_mb=None, timeout=None):
+    sources = parse_sources(';'.join(source_specs))
+    if len(sources) == 1 and sources[0].location == source_specs[0]:
+        return lambda: load_prepared(sources[0].location, snapshot_path, chunk_mb, timeout)
+    # หลายไซต์ -> โหลดพร้อมกันแล้วรวมพร้อมมิติ site (ttl=0: โหลดใหม่ทุกรอบ)
+    def load_site(source):
+        return load_prepared(source.location, site_snapshot_path(snapshot_path, source.site), chunk_mb, timeout)
+    return MultiSourceLoader(sources, load_site, ttl=0, timeout=timeout).load
+
+
+def main():
+    parser = argparse.ArgumentParser(description="เตรียมข้อมูล Helpdesk ล่วงหน้า แล้วเขียน snapshot ลงโฟลเดอร์ที่แชร์ร่วมกัน")
+    parser.add_argument('--source', required=True, action='append', help="URL หรือ path ไฟล์ CSV (ใส่ซ้ำได้หลายไซต์ รูปแบบ ชื่อไซต์=แหล่งข้อมูล)")
+    parser.add_argument('--shared-dir', required=True, help="โฟลเดอร์ที่ทุก replica อ่านร่วมกัน (HELPDESK_SHARED_DIR)")
+    parser.add_argument('--snapshot', help="path Parquet สำหรับ delta sync (ไม่ใส่ = โหลดใหม่ทั้งหมดทุกรอบ)")
+    parser.add_argument('--chunk-mb', type=float, help="ขนาดโดยประมาณ (MB) ต่อ chunk สำหรับโหลด CSV ทีละ chunk (ไม่ใช่เพดานหน่วยความจำ; ไม่ใส่ = โหลดทีเดียว)")
+    parser.add_argument('--timeout', type=float, default=60, help="วินาทีสูงสุดต่อแหล่งข้อมูล")
+    parser.add_argument('--interval', type=int, default=300, help="วินาทีระหว่างรอบ")
+    parser.add_argument('--keep', type=int, default=3, help="จำนวน version ที่เก็บไว้")
+    parser.add_argument('--once', action='store_true', help="รันรอบเดียวแล้วจบ")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    load_fn = make_load_fn(args.source, args.snapshot, args.chunk_mb, args.timeout)
+
+    while True:
+        try:
+            run_once(load_fn, args.shared_dir, args.keep)
+        except Exception:
+            # รอบนี้พัง -> replica ยังอ่าน version ล่าสุดที่ดีอยู่ได้ตามปกติ
+            log.exception("precompute failed; keeping the previous version")
+            if args.once:
+                raise
+        if args.once:
+            break
+        time.sleep(args.interval)
+
+
+if __name__ == '__main__':
+    main()
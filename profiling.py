@@ -0,0 +1,89 @@
+import argparse
+import json
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+
+import pandas as pd
+
+# ==========================================
+# จับเวลาแต่ละขั้นตอนของการ rerun (1 instance ต่อ 1 rerun)
+# ==========================================
+_LOG_LOCK = threading.Lock()
+
+
+class RerunProfiler:
+    def __init__(self, scope='app'):
+        # scope: 'app' = rerun ทั้งหน้า, 'fragment:<ชื่อ>' = rerun เฉพาะ fragment
+        self.run_id = uuid.uuid4().hex[:12]
+        self.scope = scope
+        self.started_at = datetime.now().isoformat(timespec='milliseconds')
+        self._started = time.perf_counter()
+        self._finished = None
+        self.stages = []
+
+    @contextmanager
+    def stage(self, name, rows=None, **extra):
+        # yield record ออกไป เพื่อให้เติม rows/ข้อมูลอื่นระหว่างขั้นตอนได้
+        record = {'stage': name, 'ms': None, 'rows': rows, **extra}
+        self.stages.append(record)
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record['ms'] = round((time.perf_counter() - start) * 1000, 2)
+
+    def record(self, name, ms, rows=None, **extra):
+        self.stages.append({'stage': name, 'ms': round(ms, 2), 'rows': rows, **extra})
+
+    def close(self):
+        self._finished = time.perf_counter()
+
+    @property
+    def closed(self):
+        return self._finished is not None
+
+    @property
+    def total_ms(self):
+        return round(((self._finished or time.perf_counter()) - self._started) * 1000, 2)
+
+    def as_frame(self):
+        return pd.DataFrame(self.stages, columns=['stage', 'ms', 'rows', 'cache']).astype({'rows': 'Int64'})
+
+    def to_record(self, **context):
+        return {
+            'run_id': self.run_id, 'scope': self.scope, 'started_at': self.started_at, 'total_ms': self.total_ms,
+            **context, 'stages': self.stages,
+        }
+
+    def write(self, path, **context):
+        line = json.dumps(self.to_record(**context), ensure_ascii=False, default=str)
+        with _LOG_LOCK, open(path, 'a', encoding='utf-8') as f:
+            f.write(line + '\n')
+
+
+def summarize_log(path, percentiles=(50, 90, 99)):
+    records = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            run = json.loads(line)
+            records.append({'stage': f"total:{run.get('scope', 'app')}", 'ms': run['total_ms']})
+            records.extend({'stage': s['stage'], 'ms': s['ms']} for s in run['stages'] if s.get('ms') is not None)
+    timings = pd.DataFrame(records, columns=['stage', 'ms'])
+    summary = timings.groupby('stage', sort=False)['ms'].quantile([p / 100 for p in percentiles]).unstack()
+    summary.columns = [f"p{p}" for p in percentiles]
+    summary.insert(0, 'runs', timings.groupby('stage', sort=False).size())
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="สรุป percentile เวลาแต่ละขั้นตอนจาก log การ rerun (JSON lines)")
+    parser.add_argument('log', help="path ไฟล์ log")
+    args = parser.parse_args()
+    print(summarize_log(args.log).round(1).to_string())
+
+
+if __name__ == '__main__':
+    main()
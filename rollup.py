@@ -0,0 +1,60 @@
+import pandas as pd
+
+from data_prep import SITE_COL
+from sla_engine import CLOSED_STATUSES, closed_mask
+
+# ==========================================
+# Rollup cube: จำนวนเคสต่อกลุ่มมิติ (สร้างครั้งเดียวต่อการโหลดข้อมูล)
+# ==========================================
+CUBE_DIMS = ['Received_Date', SITE_COL, 'แผนก', 'สถานะ', 'sla_status_label', 'Category', 'Sub Category']
+COUNT_COL = 'count'
+
+
+def build_cube(df):
+    dims = [c for c in CUBE_DIMS if c in df.columns]
+    return df.groupby(dims, dropna=False, observed=True, sort=False).size().reset_index(name=COUNT_COL)
+
+def build_closed_cube(df):
+    # เคสที่ปิดแล้วมีป้าย SLA คงที่ -> cache ไว้พร้อมข้อมูลได้เลย
+    return build_cube(df[closed_mask(df['สถานะ'])])
+
+def build_open_cube(df):
+    # เคสที่เปิดอยู่ป้าย SLA เปลี่ยนตามเวลา -> สร้างใหม่ทุก rerun (เฉพาะเคสเปิด)
+    return build_cube(df[~closed_mask(df['สถานะ'])])
+
+def combine_cubes(*cubes):
+    parts = [c for c in cubes if not c.empty]
+    if not parts:
+        return cubes[0]
+    cube = pd.concat(parts, ignore_index=True)
+    dims = [c for c in CUBE_DIMS if c in cube.columns]
+    return cube.groupby(dims, dropna=False, observed=True, sort=False)[COUNT_COL].sum().reset_index()
+
+def filter_frame(frame, start_date, end_date, depts=None, statuses=None, slas=None, sites=None):
+    # ใช้ได้ทั้งกับ cube และข้อมูลดิบ เพราะชื่อคอลัมน์มิติเหมือนกัน
+    mask = (frame['Received_Date'] >= pd.Timestamp(start_date)) & (frame['Received_Date'] <= pd.Timestamp(end_date))
+    if depts: mask &= frame['แผนก'].isin(depts)
+    if statuses: mask &= frame['สถานะ'].isin(statuses)
+    if slas: mask &= frame['sla_status_label'].isin(slas)
+    if sites: mask &= frame[SITE_COL].isin(sites)
+    return frame[mask]
+
+def cube_total(cube, col=None, values=None):
+    if col is None:
+        return int(cube[COUNT_COL].sum())
+    return int(cube.loc[cube[col].isin(values), COUNT_COL].sum())
+
+def cube_counts(cube, dims, names=None, by_count=True):
+    # แทน value_counts / groupby().size() บนข้อมูลดิบ
+    dims = [dims] if isinstance(dims, str) else list(dims)
+    out = cube.groupby(dims, observed=True)[COUNT_COL].sum()
+    out = out[out > 0]
+    if by_count:
+        out = out.sort_values(ascending=False, kind='stable')
+    out = out.reset_index()
+    if names:
+        out.columns = names
+    return out
+
+def cube_closed_total(cube):
+    return cube_total(cube, 'สถานะ', CLOSED_STATUSES)
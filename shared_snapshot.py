@@ -0,0 +1,66 @@
+import json
+import os
+import shutil
+import uuid
+from datetime import datetime
+
+import pandas as pd
+
+# ==========================================
+# Snapshot ที่เตรียมเสร็จแล้ว แชร์ระหว่างหลาย process (หลาย replica)
+# โครงสร้าง: <root>/versions/<version>/{data,closed_cube}.parquet + meta.json
+#           <root>/LATEST  <- ชื่อ version ล่าสุด (สลับแบบ atomic ด้วย os.replace)
+# ==========================================
+LATEST_FILE = 'LATEST'
+VERSIONS_DIR = 'versions'
+DATA_FILE = 'data.parquet'
+CUBE_FILE = 'closed_cube.parquet'
+META_FILE = 'meta.json'
+
+
+class SharedSnapshotDir:
+    def __init__(self, root):
+        self.root = root
+        self.versions_dir = os.path.join(root, VERSIONS_DIR)
+
+    def latest_version(self):
+        try:
+            with open(os.path.join(self.root, LATEST_FILE), encoding='utf-8') as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def read(self, version):
+        path = os.path.join(self.versions_dir, version)
+        # memory_map ให้ pyarrow อ่านไฟล์ผ่าน mmap (ลดการ copy ตอนอ่าน) -- ผู้เรียกที่เก็บผลใน st.cache_data
+        # จะได้สำเนาของตัวเองทุกครั้ง ไม่ได้แชร์หน่วยความจำข้าม process
+        df = pd.read_parquet(os.path.join(path, DATA_FILE), memory_map=True)
+        closed_cube = pd.read_parquet(os.path.join(path, CUBE_FILE), memory_map=True)
+        with open(os.path.join(path, META_FILE), encoding='utf-8') as f:
+            meta = json.load(f)
+        return df, closed_cube, meta
+
+    def publish(self, df, closed_cube, meta, keep=3):
+        os.makedirs(self.versions_dir, exist_ok=True)
+        version = f"{datetime.now():%Y%m%dT%H%M%S%f}-{uuid.uuid4().hex[:6]}"
+        # เขียนลงโฟลเดอร์ชั่วคราวให้ครบก่อน แล้วค่อย rename -> ผู้อ่านไม่เห็นไฟล์ที่เขียนไม่เสร็จ
+        tmp_path = os.path.join(self.versions_dir, f".tmp-{version}")
+        os.makedirs(tmp_path)
+        df.to_parquet(os.path.join(tmp_path, DATA_FILE), index=False)
+        closed_cube.to_parquet(os.path.join(tmp_path, CUBE_FILE), index=False)
+        with open(os.path.join(tmp_path, META_FILE), 'w', encoding='utf-8') as f:
+            json.dump({**meta, 'version': version}, f, ensure_ascii=False, default=str)
+        os.rename(tmp_path, os.path.join(self.versions_dir, version))
+
+        latest_tmp = os.path.join(self.root, f".{LATEST_FILE}.{version}")
+        with open(latest_tmp, 'w', encoding='utf-8') as f:
+            f.write(version)
+        os.replace(latest_tmp, os.path.join(self.root, LATEST_FILE))
+        self.prune(keep)
+        return version
+
+    def prune(self, keep):
+        # เก็บ version เก่าไว้บ้าง เผื่อ replica ที่ยังอ่าน version ก่อนหน้าอยู่
+        versions = sorted(v for v in os.listdir(self.versions_dir) if not v.startswith('.'))
+        for version in versions[:-keep]:
+            shutil.rmtree(os.path.join(self.versions_dir, version), ignore_errors=True)
@@ -0,0 +1,126 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+# ==========================================
+# ค่าคงที่ของสถานะ / ป้าย SLA
+# ==========================================
+CLOSED_STATUSES = ['ปิด Case', 'เสร็จสิ้น']
+
+LABEL_WITHIN = '✅ ภายใน SLA'
+LABEL_CLOSED_BREACHED = '❌ เกิน SLA (ปิดแล้ว)'
+LABEL_OVERDUE = '🔥 เกินกำหนด (รีบปิดด่วน!)'
+LABEL_WARNING = '⚠️ ใกล้หลุด SLA (เร่งมือ)'
+LABEL_NORMAL = '🟢 ปกติ'
+LABEL_NO_SLA = 'ไม่พบข้อมูล SLA'
+SLA_LABEL_DTYPE = pd.CategoricalDtype([
+    LABEL_WITHIN, LABEL_CLOSED_BREACHED, LABEL_OVERDUE, LABEL_WARNING, LABEL_NORMAL, LABEL_NO_SLA,
+])
+
+WARNING_RATIO = 0.8
+
+SLA_UNIT_MINUTES = {'วัน': 1440, 'ชั่วโมง': 60, 'นาที': 1}
+
+
+# ==========================================
+# เวอร์ชันเดิม (ทีละแถว) เก็บไว้เป็นตัวอ้างอิงสำหรับ benchmark
+# ==========================================
+def parse_sla_to_mins(sla_text):
+    if pd.isna(sla_text): return 0
+    text = str(sla_text)
+    days = sum(map(int, re.findall(r'(\d+)\s*วัน', text)))
+    hours = sum(map(int, re.findall(r'(\d+)\s*ชั่วโมง', text)))
+    mins = sum(map(int, re.findall(r'(\d+)\s*นาที', text)))
+    return (days * 1440) + (hours * 60) + mins
+
+def calculate_actual_mins(row, now):
+    if row['สถานะ'] in CLOSED_STATUSES:
+        if pd.notna(row['Received_DT']) and pd.notna(row['Closed_DT']):
+            return (row['Closed_DT'] - row['Received_DT']).total_seconds() / 60
+        return 0
+    else:
+        if pd.notna(row['Received_DT']):
+            return (now - row['Received_DT']).total_seconds() / 60
+        return 0
+
+def get_sla_status_label(row):
+    limit = row['sla_limit_minutes']
+    actual = row['actual_minutes_spent']
+    is_closed = row['สถานะ'] in CLOSED_STATUSES
+    if is_closed: return LABEL_WITHIN if actual <= limit else LABEL_CLOSED_BREACHED
+    else:
+        if actual > limit: return LABEL_OVERDUE
+        elif limit > 0 and (actual / limit) >= WARNING_RATIO: return LABEL_WARNING
+        else: return LABEL_NORMAL
+
+
+# ==========================================
+# เวอร์ชันทั้งคอลัมน์ (Vectorized)
+# ==========================================
+def parse_sla_series(sla):
+    # ข้อความ SLA มีไม่กี่แบบ -> แยกเฉพาะค่าที่ไม่ซ้ำ แล้ว map กลับทั้งคอลัมน์
+    codes, uniques = pd.factorize(sla, use_na_sentinel=True)
+    if len(uniques) == 0:
+        return pd.Series(0, index=sla.index, dtype='int64')
+    text = pd.Series(uniques, dtype=object).astype(str)
+    unique_mins = np.zeros(len(text), dtype='int64')
+    for unit, factor in SLA_UNIT_MINUTES.items():
+        found = text.str.extractall(rf'(\d+)\s*{unit}')
+        if found.empty: continue
+        per_value = found[0].astype('int64').groupby(level=0).sum()
+        unique_mins[per_value.index.to_numpy()] += per_value.to_numpy() * factor
+    # code -1 คือค่าว่าง (NaN) -> 0 นาที
+    mins = np.where(codes >= 0, unique_mins[np.maximum(codes, 0)], 0)
+    return pd.Series(mins, index=sla.index, dtype='int64')
+
+def closed_mask(status):
+    return status.isin(CLOSED_STATUSES).to_numpy()
+
+def _datetime_col(df, col):
+    if col in df.columns:
+        return df[col]
+    return pd.Series(pd.NaT, index=df.index, dtype='datetime64[ns]')
+
+def _elapsed_minutes(start, end):
+    mins = ((end - start).dt.total_seconds() / 60).to_numpy(dtype='float64', na_value=np.nan)
+    return np.nan_to_num(mins, nan=0.0)
+
+def _closed_labels(limit, actual):
+    return np.where(actual <= limit, LABEL_WITHIN, LABEL_CLOSED_BREACHED).astype(object)
+
+def _open_labels(limit, actual):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        near_limit = (limit > 0) & (actual / limit >= WARNING_RATIO)
+    return np.select([actual > limit, near_limit], [LABEL_OVERDUE, LABEL_WARNING], default=LABEL_NORMAL).astype(object)
+
+# ส่วนที่ไม่ขึ้นกับเวลา (SLA limit + เคสที่ปิดแล้ว) -> เก็บใน cache ได้
+def apply_static_sla_columns(df):
+    if 'SLA' not in df.columns:
+        df['sla_status_label'] = LABEL_NO_SLA
+        return df
+    limit = parse_sla_series(df['SLA'])
+    is_closed = closed_mask(df['สถานะ'])
+    actual = np.where(is_closed, _elapsed_minutes(_datetime_col(df, 'Received_DT'), _datetime_col(df, 'Closed_DT')), np.nan)
+    labels = np.where(is_closed, _closed_labels(limit.to_numpy(dtype='float64'), actual), None)
+    df['sla_limit_minutes'] = limit
+    df['actual_minutes_spent'] = pd.Series(actual, index=df.index, dtype='float64')
+    df['sla_status_label'] = pd.Series(labels, index=df.index, dtype=object)
+    return df
+
+# ส่วนที่ขึ้นกับเวลา (อายุเคสที่ยังเปิดอยู่) -> คำนวณใหม่ทุกครั้งที่ rerun เฉพาะเคสที่เปิด
+def age_open_tickets(df, now):
+    if 'sla_limit_minutes' not in df.columns:
+        return df
+    # limit ว่าง = ไซต์ที่ไม่มีคอลัมน์ SLA (เมื่อรวมหลาย Sheet) -> คงป้าย 'ไม่พบข้อมูล SLA'
+    is_open = ~closed_mask(df['สถานะ']) & df['sla_limit_minutes'].notna().to_numpy()
+    if not is_open.any():
+        return df
+    actual = _elapsed_minutes(_datetime_col(df, 'Received_DT')[is_open], now)
+    limit = df['sla_limit_minutes'].to_numpy(dtype='float64')[is_open]
+    df.loc[is_open, 'actual_minutes_spent'] = actual.astype(df['actual_minutes_spent'].dtype)
+    df.loc[is_open, 'sla_status_label'] = _open_labels(limit, actual)
+    return df
+
+def apply_sla_columns(df, now):
+    return age_open_tickets(apply_static_sla_columns(df), now)
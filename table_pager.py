@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+
+from data_prep import CASE_COL, RECEIVED_COL, SITE_COL
+
+# ==========================================
+# ตาราง Raw Data Log แบบแบ่งหน้า (ตัดเฉพาะหน้าที่แสดงส่งไปยัง browser)
+# ==========================================
+DISPLAY_COLS = [CASE_COL, SITE_COL, 'วันที่รับเรื่อง', 'แผนก', 'Category', 'Sub Category', 'สถานะ', 'SLA', 'sla_status_label']
+SEARCH_COLS = [CASE_COL, 'Category', 'Sub Category']
+# คอลัมน์ที่แสดงเป็นข้อความ แต่ต้องเรียงตามค่าจริง
+SORT_KEYS = {'วันที่รับเรื่อง': 'Received_DT', 'SLA': 'sla_limit_minutes'}
+PAGE_SIZES = [25, 50, 100, 250]
+
+
+def search_mask(df, text):
+    text = (text or '').strip()
+    if not text:
+        return None
+    mask = np.zeros(len(df), dtype=bool)
+    for col in SEARCH_COLS:
+        if col not in df.columns: continue
+        values = df[col]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            # ค้นในรายการ category (ไม่กี่ค่า) แล้ว map กลับด้วย code
+            hits = values.cat.categories.astype(str).str.contains(text, case=False, regex=False)
+            mask |= np.isin(values.cat.codes.to_numpy(), np.flatnonzero(hits))
+        else:
+            mask |= values.astype(str).str.contains(text, case=False, regex=False).to_numpy()
+    return mask
+
+def _sort_key(values):
+    # แปลงเป็นตัวเลขเพื่อใช้ argpartition ได้ ค่าว่างไปอยู่ท้ายเสมอ
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        key = values.cat.codes.to_numpy().astype('float64')
+        key[key < 0] = np.nan
+    elif pd.api.types.is_datetime64_any_dtype(values):
+        key = values.to_numpy(dtype='datetime64[ns]').astype('int64').astype('float64')
+        key[values.isna().to_numpy()] = np.nan
+    elif pd.api.types.is_numeric_dtype(values):
+        key = values.to_numpy(dtype='float64', na_value=np.nan)
+    else:
+        codes, _ = pd.factorize(values, sort=True)
+        key = codes.astype('float64')
+        key[codes < 0] = np.nan
+    return key
+
+def _top_positions(key, ascending, k):
+    # เรียงเฉพาะ k แถวแรกที่ต้องใช้ (partition O(n)) แทนการเรียงทั้งตาราง
+    key = key if ascending else -key
+    key = np.where(np.isnan(key), np.inf, key)
+    if k < len(key):
+        # เอาทุกแถวที่เท่ากับค่าลำดับที่ k ด้วย เพื่อให้ลำดับของค่าซ้ำคงที่ทุกหน้า
+        kth = np.partition(key, k - 1)[k - 1]
+        candidates = np.flatnonzero(key <= kth)
+    else:
+        candidates = np.arange(len(key))
+    return candidates[np.lexsort((candidates, key[candidates]))][:k]
+
+def query_page(df, search='', sort_col=None, ascending=True, page=1, page_size=PAGE_SIZES[1]):
+    positions = np.arange(len(df))
+    mask = search_mask(df, search)
+    if mask is not None:
+        positions = positions[mask]
+    total = len(positions)
+    pages = max(1, -(-total // page_size))
+    page = min(max(1, page), pages)
+    start, stop = (page - 1) * page_size, min(page * page_size, total)
+
+    if sort_col and total:
+        key_col = SORT_KEYS.get(sort_col, sort_col)
+        key = _sort_key(df[key_col].iloc[positions] if mask is not None else df[key_col])
+        positions = positions[_top_positions(key, ascending, stop)]
+    page_df = df.iloc[positions[start:stop]]
+
+    if RECEIVED_COL in page_df.columns:
+        page_df = page_df.assign(**{'วันที่รับเรื่อง': page_df[RECEIVED_COL]})
+    available_cols = [c for c in DISPLAY_COLS if c in page_df.columns]
+    return page_df[available_cols], total, pages